@@ -3,6 +3,8 @@ import async_dash.monkey_patch_callback_context
 import async_dash.monkey_patch_dash
 
 from async_dash.monkey_patch_dash import Dash
+from async_dash.cancellation import is_cancelled
+from async_dash.long_callback import AsyncioLongCallbackManager
 
 async_dash.monkey_patch_callback.apply()
 async_dash.monkey_patch_callback_context.apply()
@@ -0,0 +1,141 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+from async_dash.metrics import record_phase
+
+# Priority classes, invocations of a lower class are admitted first. Integers can be used for finer control.
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+def validate_priority(priority):
+    if priority is None or isinstance(priority, int) or priority in PRIORITIES:
+        return
+    raise ValueError("Invalid callback priority '{}', expected one of {} or an integer.".format(
+        priority, ", ".join(PRIORITIES)))
+
+
+class OverloadedError(Exception):
+    """Raised when an invocation cannot be admitted because the admission queue is full."""
+
+
+class _PrioritySemaphore:
+    """Semaphore handing free slots to the waiter with the lowest priority value, first come first served within
+    the same priority."""
+
+    def __init__(self, value):
+        self._value = value
+        self._waiters = []
+        self._counter = itertools.count()
+
+    def locked(self):
+        return self._value <= 0
+
+    async def acquire(self, priority):
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        waiter = (priority, next(self._counter), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        try:
+            await waiter[2]
+        except asyncio.CancelledError:
+            if waiter[2].cancelled():
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    heapq.heapify(self._waiters)
+            else:
+                # The slot was handed over just before the cancellation, pass it on.
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            future = heapq.heappop(self._waiters)[2]
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+
+class AdmissionController:
+    """Bounds the number of callback invocations executing concurrently, globally and per callback. Invocations that
+    cannot execute right away wait in a queue ordered by priority; when the queue is full, they are rejected with
+    ``OverloadedError`` rather than letting the latency grow without limit.
+
+    :param max_concurrency: Maximum number of invocations executing concurrently, ``None`` for no limit.
+    :param max_queue: Maximum number of invocations waiting to execute, ``None`` for no limit.
+    """
+
+    def __init__(self, max_concurrency=None, max_queue=None):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.admitted = 0
+        self.rejected = 0
+        self.queued = 0
+        self.running = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self._global = None if max_concurrency is None else _PrioritySemaphore(max_concurrency)
+        self._per_callback = {}
+
+    async def run(self, callback_id, func, priority=None, max_concurrency=None):
+        """Return ``await func()`` once admitted, raising ``OverloadedError`` if the queue is full."""
+        priority = PRIORITIES.get(priority, priority)
+        if priority is None:
+            priority = PRIORITIES["normal"]
+        semaphores = []
+        if max_concurrency is not None:
+            semaphore = self._per_callback.get(callback_id)
+            if semaphore is None:
+                semaphore = self._per_callback[callback_id] = _PrioritySemaphore(max_concurrency)
+            semaphores.append(semaphore)
+        if self._global is not None:
+            # Acquired last, so that invocations held back by their callback limit do not block others.
+            semaphores.append(self._global)
+
+        must_wait = any(s.locked() for s in semaphores)
+        if must_wait and self.max_queue is not None and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise OverloadedError()
+
+        acquired = []
+        start = time.perf_counter()
+        if must_wait:
+            self.queued += 1
+        try:
+            for semaphore in semaphores:
+                await semaphore.acquire(priority)
+                acquired.append(semaphore)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        finally:
+            if must_wait:
+                self.queued -= 1
+        wait_time = time.perf_counter() - start
+        record_phase("queue", start)
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+        self.admitted += 1
+
+        self.running += 1
+        try:
+            return await func()
+        finally:
+            self.running -= 1
+            for semaphore in acquired:
+                semaphore.release()
+
+    @property
+    def stats(self):
+        return {
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "running": self.running,
+            "queued": self.queued,
+            "wait_time_total": self.wait_time_total,
+            "wait_time_max": self.wait_time_max,
+        }
@@ -0,0 +1,144 @@
+import asyncio
+import collections
+import gzip
+import hashlib
+import pkgutil
+
+from quart.utils import run_sync
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# Only text-like resources benefit from compression, fonts/images are already compressed.
+COMPRESSIBLE_MIMETYPES = {
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+
+
+class CachedAsset:
+    """A component suite resource held in memory together with its ETag and pre-compressed variants."""
+
+    __slots__ = ("data", "etag", "variants", "size")
+
+    def __init__(self, data, etag, variants):
+        self.data = data
+        self.etag = etag
+        self.variants = variants
+        self.size = len(data) + sum(len(v) for v in variants.values())
+
+    def select(self, accept_encoding):
+        """Return (encoding, body, etag) for the best representation accepted by the client."""
+        if accept_encoding and self.variants:
+            accepted = _accepted_encodings(accept_encoding)
+            for encoding in ("br", "gzip"):
+                if encoding in self.variants and encoding in accepted:
+                    return encoding, self.variants[encoding], "{}-{}".format(self.etag, encoding)
+        return None, self.data, self.etag
+
+
+def _accepted_encodings(accept_encoding):
+    """Return the codings listed in an Accept-Encoding header, but those refused with ``q=0``."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip())
+    return accepted
+
+
+def _retrieve_exception(task):
+    # All requesters may have gone away, the exception reaches those still waiting through their await.
+    if not task.cancelled():
+        task.exception()
+
+
+class AssetCache:
+    """LRU cache of component suite resources.
+
+    Resources are read (and compressed) lazily in a worker thread on first request, so that neither disk I/O nor
+    hashing/compression ever runs on the event loop. Subsequent requests are served straight from memory.
+
+    :param max_size: Maximum number of bytes (including compressed variants) to keep in memory. Resources larger
+        than the cap are still served, but not retained. ``None`` disables the cap.
+    :param compress_min_size: Resources smaller than this (in bytes) are not compressed.
+    :param compress_level: Compression level (0-9) used for the brotli and gzip variants.
+    """
+
+    def __init__(self, max_size=128 * 1024 * 1024, compress_min_size=1024, compress_level=9):
+        self.max_size = max_size
+        self.compress_min_size = compress_min_size
+        self.compress_level = compress_level
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._pending = {}
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, package_name, path_in_pkg, mimetype):
+        key = (package_name, path_in_pkg)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        # Concurrent misses for the same resource share a single load. It runs in a task of its own, so that a
+        # disconnecting first requester does not cancel it for the others.
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.ensure_future(self._load_and_store(key, mimetype))
+            task.add_done_callback(_retrieve_exception)
+        return await asyncio.shield(task)
+
+    async def _load_and_store(self, key, mimetype):
+        try:
+            entry = await run_sync(self._load)(*key, mimetype)
+        finally:
+            del self._pending[key]
+        self._store(key, entry)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def _load(self, package_name, path_in_pkg, mimetype):
+        data = pkgutil.get_data(package_name, path_in_pkg)
+        etag = hashlib.md5(data).hexdigest()
+        variants = {}
+        # Compressing is only worth it if the result is retained.
+        if self.max_size != 0 and mimetype in COMPRESSIBLE_MIMETYPES and len(data) >= self.compress_min_size:
+            if brotli is not None:
+                variants["br"] = brotli.compress(data, mode=brotli.MODE_TEXT, quality=self.compress_level)
+            variants["gzip"] = gzip.compress(data, compresslevel=self.compress_level, mtime=0)
+            # Drop variants that do not pay off.
+            variants = {k: v for k, v in variants.items() if len(v) < len(data)}
+        return CachedAsset(data, etag, variants)
+
+    def _store(self, key, entry):
+        if self.max_size is not None and entry.size > self.max_size:
+            return
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.max_size is not None and self.size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
@@ -0,0 +1,122 @@
+import asyncio
+import collections
+import sys
+import threading
+import time
+import traceback
+
+from quart.utils import run_sync
+
+
+class _Step:
+    __slots__ = ("callback_id", "start")
+
+    def __init__(self, callback_id, start):
+        self.callback_id = callback_id
+        self.start = start
+
+
+class _Monitored:
+    """Awaitable driving a coroutine step by step, marking the callback it belongs to as running while a step
+    executes. A step is everything a coroutine does between two awaits of something that is not ready, i.e. the time
+    it holds the event loop."""
+
+    __slots__ = ("detector", "callback_id", "coro")
+
+    def __init__(self, detector, callback_id, coro):
+        self.detector = detector
+        self.callback_id = callback_id
+        self.coro = coro
+
+    def __await__(self):
+        iterator = self.coro.__await__()
+        value, error = None, None
+        while True:
+            self.detector._current = _Step(self.callback_id, time.perf_counter())
+            try:
+                yielded = iterator.send(value) if error is None else iterator.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.detector._current = None
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:  # pylint: disable=broad-except
+                value, error = None, e
+
+
+class BlockingDetector:
+    """Detects coroutine callbacks holding the event loop for longer than ``threshold`` seconds, typically because
+    they call blocking code (a synchronous HTTP client or database driver, heavy pandas work) instead of awaiting.
+
+    A watchdog thread checks the running step of the monitored coroutines. When one exceeds the threshold, it takes a
+    snapshot of the stack of the event loop thread, and reports the callback through the exception handler of the
+    loop once the loop is free again.
+
+    :param threshold: Number of seconds a callback may hold the event loop.
+    :param offload: If ``True``, later invocations of a callback reported as blocking run in a fresh event loop of a
+        worker thread, so that they cannot block the server loop anymore.
+    :param max_reports: Number of reports kept, the oldest are dropped first.
+    """
+
+    def __init__(self, threshold=0.1, offload=False, max_reports=100):
+        self.threshold = threshold
+        self.offload = offload
+        self.flagged = set()
+        self.reports = collections.deque(maxlen=max_reports)
+        self._current = None
+        self._loop = None
+        self._loop_thread = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    async def run(self, callback_id, func, args, kwargs):
+        """Return ``await func(*args, **kwargs)``, monitoring (or offloading) the coroutine."""
+        if self.offload and callback_id in self.flagged:
+            return await run_sync(_run_in_new_loop)(func, args, kwargs)
+        if self._thread is None:
+            self.start()
+        return await _Monitored(self, callback_id, func(*args, **kwargs))
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._watch, name="async-dash-blocking-detector", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stopped.set()
+        self._thread = None
+
+    def _watch(self):
+        reported = None
+        while not self._stopped.wait(self.threshold / 4):
+            step = self._current
+            if step is None or step is reported or time.perf_counter() - step.start < self.threshold:
+                continue
+            reported = step
+            frame = sys._current_frames().get(self._loop_thread)  # pylint: disable=protected-access
+            self._report(step, "".join(traceback.format_stack(frame)) if frame is not None else "")
+
+    def _report(self, step, stack):
+        self.flagged.add(step.callback_id)
+        report = {"callback": step.callback_id, "time": time.time(), "stack": stack}
+        self.reports.append(report)
+        context = {
+            "message": "Callback [{}] blocked the event loop for more than {} seconds{}:\n{}".format(
+                step.callback_id,
+                self.threshold,
+                ", later invocations run in a worker thread" if self.offload else "",
+                stack,
+            ),
+            "callback": step.callback_id,
+        }
+        try:
+            self._loop.call_soon_threadsafe(self._loop.call_exception_handler, context)
+        except RuntimeError:  # the loop is closed
+            pass
+
+
+def _run_in_new_loop(func, args, kwargs):
+    return asyncio.run(func(*args, **kwargs))
@@ -0,0 +1,159 @@
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from quart.utils import run_sync
+
+
+def invocation_key(callback_id, body):
+    """Key identifying a callback invocation, i.e. the callback id plus a canonical hash of everything the callback
+    (and its response) depends on: input and state values, the triggering props and the (wildcard) outputs."""
+    payload = json.dumps(
+        [body.get("inputs", []), body.get("state", []), body.get("changedPropIds", []), body.get("outputs")],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return "{}:{}".format(callback_id, hashlib.sha256(payload.encode("utf-8")).hexdigest())
+
+
+class CallbackCache:
+    """Interface of the backends used to memoize serialized callback responses.
+
+    :param timeout: Default number of seconds an entry is valid, ``None`` for no expiry.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+
+    async def get(self, key):
+        """Return the serialized response (str, bytes or ``SerializedProps``) stored for the key, or ``None``."""
+        raise NotImplementedError
+
+    async def set(self, key, value, timeout=None):
+        """Store the serialized response for the key, ``timeout`` overrides the default of the backend."""
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+    def _expiry(self, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        return None if timeout is None else time.time() + timeout
+
+
+class MemoryCallbackCache(CallbackCache):
+    """In-process LRU cache.
+
+    :param max_size: Maximum number of entries, ``None`` for no limit.
+    :param timeout: Default number of seconds an entry is valid, ``None`` for no expiry.
+    """
+
+    def __init__(self, max_size=1024, timeout=None):
+        super().__init__(timeout)
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expiry = entry
+        if expiry is not None and expiry < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key, value, timeout=None):
+        self._entries[key] = (value, self._expiry(timeout))
+        self._entries.move_to_end(key)
+        while self.max_size is not None and len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileCallbackCache(CallbackCache):
+    """Cache storing one file per entry, to be shared between worker processes. Point ``directory`` to a tmpfs
+    mount (e.g. ``/dev/shm``) to keep the entries in shared memory. File access runs in a worker thread.
+
+    :param directory: Directory holding the entries, created if it does not exist.
+    :param max_size: Maximum number of entries, ``None`` for no limit. The least recently used entries are removed.
+    :param timeout: Default number of seconds an entry is valid, ``None`` for no expiry.
+    """
+
+    def __init__(self, directory, max_size=1024, timeout=None):
+        super().__init__(timeout)
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    async def get(self, key):
+        return await run_sync(self._get)(key)
+
+    async def set(self, key, value, timeout=None):
+        await run_sync(self._set)(key, value, self._expiry(timeout))
+
+    async def clear(self):
+        await run_sync(self._prune)(0)
+
+    def _get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                expiry, value = f.read().split(b"\n", 1)
+        except (FileNotFoundError, ValueError):
+            return None
+        if expiry and float(expiry) < time.time():
+            self._remove(path)
+            return None
+        # Track recency for the LRU eviction.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def _set(self, key, value, expiry):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp")
+        if not isinstance(value, bytes):
+            value = str(value).encode("utf-8")
+        with os.fdopen(fd, "wb") as f:
+            f.write("{}\n".format("" if expiry is None else expiry).encode("ascii"))
+            f.write(value)
+        os.replace(tmp, self._path(key))
+        if self.max_size is not None:
+            self._prune(self.max_size)
+
+    def _prune(self, max_size):
+        entries = [e for e in os.scandir(self.directory) if not e.name.startswith(".")]
+        if len(entries) <= max_size:
+            return
+        mtimes = []
+        for entry in entries:
+            try:
+                mtimes.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:  # removed by another worker
+                pass
+        # Evict down to 90% of the limit, so that eviction does not happen on every insert.
+        mtimes.sort()
+        for _, path in mtimes[:len(mtimes) - int(max_size * 0.9)]:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
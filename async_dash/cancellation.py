@@ -0,0 +1,64 @@
+import asyncio
+import hashlib
+import json
+
+from async_dash.monkey_patch_callback_context import callback_globals
+
+
+def is_cancelled():
+    """Return ``True`` if the current callback invocation has been cancelled, because the client disconnected, a
+    newer invocation superseded it or it timed out.
+
+    Cancellation reaches coroutine callbacks as ``asyncio.CancelledError``. Synchronous callbacks running in a thread
+    cannot be interrupted, long running ones should poll this function and return early.
+    """
+    g = callback_globals.get()
+    return g is not None and g.get("cancelled") is not None and g.cancelled.is_set()
+
+
+def supersession_key(session, callback_id, body):
+    """Invocations of a callback from the same session for the same (wildcard) outputs supersede each other."""
+    outputs = json.dumps(body.get("outputs"), sort_keys=True, separators=(",", ":"))
+    return session, callback_id, hashlib.sha256(outputs.encode("utf-8")).hexdigest()
+
+
+class _InFlight:
+    __slots__ = ("task", "superseded")
+
+    def __init__(self, task):
+        self.task = task
+        self.superseded = False
+
+
+class InFlightCallbacks:
+    """Tracks the in-flight invocations per key, cancelling the previous invocation when a newer one arrives."""
+
+    def __init__(self):
+        self.superseded = 0
+        self._in_flight = {}
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    async def run(self, key, func):
+        """Return ``await func()``, raising ``SupersededError`` if a newer invocation for the key arrived meanwhile."""
+        previous = self._in_flight.get(key)
+        if previous is not None and not previous.task.done():
+            previous.superseded = True
+            previous.task.cancel()
+            self.superseded += 1
+        entry = self._in_flight[key] = _InFlight(asyncio.ensure_future(func()))
+        try:
+            # If the caller is cancelled (client disconnected), the cancellation propagates to the task.
+            return await entry.task
+        except asyncio.CancelledError:
+            if entry.superseded:
+                raise SupersededError() from None
+            raise
+        finally:
+            if self._in_flight.get(key) is entry:
+                del self._in_flight[key]
+
+
+class SupersededError(Exception):
+    """Raised when a callback invocation is cancelled in favour of a newer invocation."""
@@ -0,0 +1,299 @@
+# Inline scripts injected into the index page to let the (unmodified) dash renderer use the async-dash specific
+# server features. Each script wraps window.fetch, intercepting the POST requests to _dash-update-component.
+
+# Whether a fetch is the POST of a callback invocation, the request the scripts intercept.
+IS_DISPATCH = """
+    function isDispatch(url, init) {
+        return typeof url === 'string' && /_dash-update-component$/.test(url) && init && init.method === 'POST';
+    }
+"""
+
+# Rebuilds the response of a single invocation ({status, body}) sent along with others. Error bodies (e.g. the
+# traceback of the dev tools) are text, sent as a JSON string.
+ITEM_RESPONSE = """
+    function itemResponse(result) {
+        if (result.status === 204) {
+            return new Response(null, {status: 204});
+        }
+        var isText = typeof result.body === 'string';
+        return new Response(isText ? result.body : JSON.stringify(result.body), {
+            status: result.status,
+            headers: {'Content-Type': isText ? 'text/html; charset=utf-8' : 'application/json'}
+        });
+    }
+"""
+
+BATCH_SCRIPT = """
+(function () {
+    var fetch = window.fetch, queue = [];
+
+    /* IS_DISPATCH */
+
+    /* ITEM_RESPONSE */
+
+    function flush() {
+        var batch = queue;
+        queue = [];
+        if (batch.length === 1) {
+            fetch(batch[0].url, batch[0].init).then(batch[0].resolve, batch[0].reject);
+            return;
+        }
+        var body = '[' + batch.map(function (r) { return r.init.body; }).join(',') + ']';
+        fetch(batch[0].url + '-batch', Object.assign({}, batch[0].init, {body: body})).then(function (res) {
+            if (res.status !== 200) {
+                return res.text().then(function (text) {
+                    batch.forEach(function (r) { r.resolve(new Response(text, {status: res.status})); });
+                });
+            }
+            return res.json().then(function (results) {
+                results.forEach(function (result, i) {
+                    batch[i].resolve(itemResponse(result));
+                });
+            });
+        }).catch(function (e) {
+            batch.forEach(function (r) { r.reject(e); });
+        });
+    }
+
+    window.fetch = function (url, init) {
+        if (!isDispatch(url, init)) {
+            return fetch.apply(this, arguments);
+        }
+        return new Promise(function (resolve, reject) {
+            // Callbacks requested within the same tick are sent together.
+            if (!queue.length) {
+                setTimeout(flush, 0);
+            }
+            queue.push({url: url, init: init, resolve: resolve, reject: reject});
+        });
+    };
+})();
+""".replace("/* IS_DISPATCH */", IS_DISPATCH).replace("/* ITEM_RESPONSE */", ITEM_RESPONSE)
+
+WEBSOCKET_SCRIPT = """
+(function () {
+    var fetch = window.fetch, socket = null, failed = false, pending = {}, nextId = 0;
+
+    /* IS_DISPATCH */
+
+    /* ITEM_RESPONSE */
+
+    function connect(url) {
+        var ws = new WebSocket(url.replace(/^http/, 'ws') + '-ws'), opened = false;
+        ws.onopen = function () { opened = true; };
+        ws.onmessage = function (event) {
+            var result = JSON.parse(event.data), request = pending[result.id];
+            if (!request) {
+                return;
+            }
+            delete pending[result.id];
+            request.resolve(itemResponse(result));
+        };
+        ws.onclose = function () {
+            if (socket === ws) {
+                socket = null;
+            }
+            // Do not keep trying if the server does not accept websockets at all.
+            failed = failed || !opened;
+            // Requests that did not get a response are retried over HTTP.
+            Object.keys(pending).forEach(function (id) {
+                var request = pending[id];
+                if (request.ws === ws) {
+                    delete pending[id];
+                    fetch(request.url, request.init).then(request.resolve, request.reject);
+                }
+            });
+        };
+        return ws;
+    }
+
+    window.fetch = function (url, init) {
+        if (failed || !isDispatch(url, init)) {
+            return fetch.apply(this, arguments);
+        }
+        if (!socket) {
+            socket = connect(new URL(url, window.location.href).href);
+        }
+        var ws = socket;
+        return new Promise(function (resolve, reject) {
+            var id = nextId++, message = '{"id":' + id + ',"body":' + init.body + '}';
+            pending[id] = {url: url, init: init, resolve: resolve, reject: reject, ws: ws};
+            if (ws.readyState === WebSocket.OPEN) {
+                ws.send(message);
+            } else {
+                ws.addEventListener('open', function () { ws.send(message); });
+            }
+        });
+    };
+})();
+""".replace("/* IS_DISPATCH */", IS_DISPATCH).replace("/* ITEM_RESPONSE */", ITEM_RESPONSE)
+
+# Applies a callback response ({id: {prop: value}}) directly to the layout held by the renderer store, without
+# triggering the callbacks depending on the updated props.
+APPLY_PROPS = """
+    function applyProps(response) {
+        var store = window.store;
+        if (!store) {
+            return;
+        }
+        var paths = store.getState().paths;
+        Object.keys(response).forEach(function (idStr) {
+            var path;
+            if (idStr.charAt(0) === '{') {
+                var id = JSON.parse(idStr), keys = Object.keys(id).sort();
+                var values = JSON.stringify(keys.map(function (key) { return id[key]; }));
+                (paths.objs[keys.join(',')] || []).forEach(function (item) {
+                    if (JSON.stringify(item.values) === values) {
+                        path = item.path;
+                    }
+                });
+            } else {
+                path = paths.strs[idStr];
+            }
+            if (path) {
+                store.dispatch({
+                    type: 'ON_PROP_CHANGE',
+                    payload: {itempath: path, props: response[idStr], source: 'response'}
+                });
+            }
+        });
+    }
+"""
+
+STREAM_SCRIPT = """
+(function () {
+    var fetch = window.fetch;
+
+    /* IS_DISPATCH */
+    /* APPLY_PROPS */
+    function readStream(res) {
+        var reader = res.body.getReader(), decoder = new TextDecoder(), buffer = '', merged = null;
+
+        function handle(line) {
+            if (!line) {
+                return;
+            }
+            var response = JSON.parse(line).response;
+            merged = merged || {};
+            Object.keys(response).forEach(function (id) {
+                merged[id] = Object.assign(merged[id] || {}, response[id]);
+            });
+            applyProps(response);
+        }
+
+        function read() {
+            return reader.read().then(function (chunk) {
+                if (chunk.done) {
+                    handle(buffer);
+                    // Hand the merged updates to the renderer, which triggers the dependent callbacks.
+                    return new Response(merged ? JSON.stringify({response: merged, multi: true}) : null, {
+                        status: merged ? 200 : 204,
+                        headers: {'Content-Type': 'application/json'}
+                    });
+                }
+                buffer += decoder.decode(chunk.value, {stream: true});
+                var lines = buffer.split('\\n');
+                buffer = lines.pop();
+                lines.forEach(handle);
+                return read();
+            });
+        }
+
+        return read();
+    }
+
+    window.fetch = function (url, init) {
+        if (!isDispatch(url, init)) {
+            return fetch.apply(this, arguments);
+        }
+        var headers = Object.assign({}, init.headers, {Accept: 'application/x-ndjson, application/json'});
+        return fetch.call(this, url, Object.assign({}, init, {headers: headers})).then(function (res) {
+            var contentType = res.headers.get('Content-Type') || '';
+            return res.body && contentType.indexOf('application/x-ndjson') === 0 ? readStream(res) : res;
+        });
+    };
+})();
+""".replace("/* IS_DISPATCH */", IS_DISPATCH).replace("/* APPLY_PROPS */", APPLY_PROPS)
+
+SESSION_SCRIPT = """
+(function () {
+    var fetch = window.fetch, session = Math.random().toString(36).slice(2) + Date.now().toString(36);
+
+    /* IS_DISPATCH */
+
+    // Identifies the page, so that the server can keep state per page (superseded invocations, output digests).
+    window.fetch = function (url, init) {
+        if (!isDispatch(url, init)) {
+            return fetch.apply(this, arguments);
+        }
+        var headers = Object.assign({}, init.headers, {'X-Dash-Session': session});
+        return fetch.call(this, url, Object.assign({}, init, {headers: headers}));
+    };
+})();
+""".replace("/* IS_DISPATCH */", IS_DISPATCH)
+
+# Subscribes the page to the shared feeds of the app (over server-sent events or a websocket, depending on the
+# transport the server replaces __TRANSPORT__ with), applying each value pushed to the layout.
+FEED_SCRIPT = """
+(function () {
+    var transport = '__TRANSPORT__', pending = null, scheduled = false, retries = 0;
+    /* APPLY_PROPS */
+    function feedsUrl() {
+        var config = JSON.parse(document.getElementById('_dash-config').textContent);
+        return new URL(config.requests_pathname_prefix + '_dash-feeds', window.location.href).href;
+    }
+
+    function flush() {
+        scheduled = false;
+        // Values pushed before the renderer loaded the layout are applied once it has.
+        if (!window.store || window.store.getState().appLifecycle !== 'HYDRATED') {
+            scheduled = true;
+            setTimeout(flush, 100);
+            return;
+        }
+        var response = pending;
+        pending = null;
+        applyProps(response);
+    }
+
+    function deliver(data) {
+        var response = JSON.parse(data).response;
+        pending = pending || {};
+        Object.keys(response).forEach(function (id) {
+            pending[id] = Object.assign(pending[id] || {}, response[id]);
+        });
+        if (!scheduled) {
+            scheduled = true;
+            setTimeout(flush, 0);
+        }
+    }
+
+    function connectWebsocket() {
+        var ws = new WebSocket(feedsUrl().replace(/^http/, 'ws') + '-ws');
+        ws.binaryType = 'arraybuffer';
+        ws.onopen = function () { retries = 0; };
+        ws.onmessage = function (event) {
+            deliver(typeof event.data === 'string' ? event.data : new TextDecoder().decode(event.data));
+        };
+        ws.onclose = function () {
+            // The server sends the latest value of each feed on reconnection.
+            setTimeout(connectWebsocket, Math.min(1000 * Math.pow(2, retries++), 30000));
+        };
+    }
+
+    function connect() {
+        if (transport === 'websocket') {
+            connectWebsocket();
+        } else {
+            // EventSource reconnects on its own.
+            new EventSource(feedsUrl()).onmessage = function (event) { deliver(event.data); };
+        }
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', connect);
+    } else {
+        connect();
+    }
+})();
+""".replace("/* APPLY_PROPS */", APPLY_PROPS)
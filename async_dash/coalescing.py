@@ -0,0 +1,56 @@
+import asyncio
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces identical concurrent invocations: while an invocation for a key is in flight, later invocations
+    for the same key await its result instead of starting new work.
+
+    The work runs in a task of its own, so that a disconnecting first caller does not cancel it for the others. It is
+    cancelled once all of its callers are (disconnected, timed out or superseded), releasing what it holds.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+
+    async def run(self, key, func):
+        """Return the result of ``await func()``, shared with concurrent calls for the same key."""
+        self.calls += 1
+        call = self._in_flight.get(key)
+        if call is not None:
+            self.coalesced += 1
+        else:
+            call = self._in_flight[key] = _Call(asyncio.ensure_future(func()))
+            call.task.add_done_callback(lambda _: self._done(key, call))
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # The last caller went away, nobody is waiting for the result anymore.
+                call.task.cancel()
+                if self._in_flight.get(key) is call:
+                    del self._in_flight[key]
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _done(self, key, call):
+        if self._in_flight.get(key) is call:
+            del self._in_flight[key]
+        # Retrieve the exception, all callers may have gone away.
+        if not call.task.cancelled():
+            call.task.exception()
+
+    @property
+    def stats(self):
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
@@ -0,0 +1,101 @@
+import collections
+import hashlib
+import json
+
+from dash._utils import to_json
+from dash.exceptions import PreventUpdate
+
+
+class SerializedProps:
+    """A callback response serialized prop by prop, so that props can be dropped without serializing it again.
+
+    :param pieces: List of ``(id, prop, json)`` tuples, ``id`` being the stringified component id and ``json`` the
+        serialized value (str or bytes).
+    """
+
+    __slots__ = ("pieces",)
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    def __str__(self):
+        return self.assemble(self.pieces)
+
+    @staticmethod
+    def assemble(pieces):
+        components = collections.defaultdict(list)
+        for id_str, prop, data in pieces:
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            components[id_str].append("{}:{}".format(json.dumps(prop), data))
+        return '{{"response":{{{}}},"multi":true}}'.format(
+            ",".join("{}:{{{}}}".format(json.dumps(id_str), ",".join(props)) for id_str, props in components.items())
+        )
+
+    @classmethod
+    def from_json(cls, data, loads=json.loads):
+        """Split a response serialized as a whole, e.g. one read from a file cache."""
+        response = loads(data)["response"]
+        return cls([(id_str, prop, to_json(value)) for id_str, props in response.items()
+                    for prop, value in props.items()])
+
+
+class OutputDiffer:
+    """Remembers, per session, a digest of the last value sent for each output prop, turning the props whose value
+    did not change into no-updates. An invocation whose props are all unchanged ends in ``PreventUpdate``.
+
+    The client is assumed to still hold the values sent, diffing is thus not suited for outputs the user can change
+    (e.g. the ``value`` of an input). Memory is bounded by evicting the least recently active sessions, and the least
+    recently updated props within a session.
+
+    :param max_sessions: Maximum number of sessions remembered.
+    :param max_props: Maximum number of props remembered per session.
+    """
+
+    def __init__(self, max_sessions=1024, max_props=4096):
+        self.max_sessions = max_sessions
+        self.max_props = max_props
+        self.sent = 0
+        self.skipped = 0
+        self.bytes_skipped = 0
+        self._sessions = collections.OrderedDict()
+
+    def apply(self, session, output_json, loads=json.loads):
+        """Return the response holding only the props that changed since they were last sent to the session."""
+        props = output_json if isinstance(output_json, SerializedProps) else SerializedProps.from_json(
+            output_json, loads)
+        digests = self._sessions.get(session)
+        if digests is None:
+            digests = self._sessions[session] = collections.OrderedDict()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session)
+
+        changed = []
+        for piece in props.pieces:
+            id_str, prop, data = piece
+            digest = hashlib.md5(data if isinstance(data, bytes) else data.encode("utf-8")).digest()
+            key = id_str, prop
+            if digests.get(key) == digest:
+                self.skipped += 1
+                self.bytes_skipped += len(data)
+                continue
+            digests[key] = digest
+            digests.move_to_end(key)
+            changed.append(piece)
+        while len(digests) > self.max_props:
+            digests.popitem(last=False)
+        self.sent += len(changed)
+
+        if not changed:
+            raise PreventUpdate
+        return SerializedProps.assemble(changed)
+
+    def forget(self, session):
+        self._sessions.pop(session, None)
+
+    @property
+    def stats(self):
+        return {"sent": self.sent, "skipped": self.skipped, "bytes_skipped": self.bytes_skipped,
+                "sessions": len(self._sessions)}
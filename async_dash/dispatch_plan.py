@@ -0,0 +1,200 @@
+import inspect
+import json
+import operator
+
+from dash import _validate
+from dash._grouping import map_grouping, grouping_len
+from dash.dependencies import Output, _Wildcard
+from dash.exceptions import CallbackException
+from dash._callback import NoUpdate
+
+
+def _is_flat(indices):
+    return not isinstance(indices, int) and indices == list(range(grouping_len(indices)))
+
+
+class DispatchPlan:
+    """Everything about a callback that is fixed at registration time, compiled once so that
+    ``Dash.dispatch`` and the ``add_context`` wrapper only have to look values up per request.
+
+    :param callback_id: The id under which the callback is stored in the callback map.
+    :param output: The (possibly grouped) output dependency of the callback.
+    :param insert_output: The output as inserted into the callback map (flattened for multi output).
+    :param multi: Whether the callback has multiple outputs.
+    :param outputs_indices: Grouping of output indices.
+    :param inputs_state_indices: Grouping of input/state indices.
+    :param executor: Executor for a synchronous callback, ``None`` to use the app default.
+    :param cache: ``True`` to memoize responses in the app cache, or a ``CallbackCache`` to memoize them in.
+    :param cache_timeout: Number of seconds a memoized response is valid, ``None`` for the cache default.
+    :param coalesce: Whether identical concurrent invocations share one execution, ``None`` for the app default.
+    :param timeout: Number of seconds after which an invocation is cancelled, ``None`` for the app default.
+    :param priority: Priority class of the invocations waiting to be admitted, ``None`` for ``"normal"``.
+    :param max_concurrency: Maximum number of invocations executing concurrently, ``None`` for no limit.
+    :param diff_outputs: Whether unchanged output props are dropped per session, ``None`` for the app default.
+    """
+
+    __slots__ = (
+        "callback_id",
+        "output",
+        "insert_output",
+        "multi",
+        "outputs_indices",
+        "inputs_state_indices",
+        "using_args_grouping",
+        "using_outputs_grouping",
+        "is_coroutine",
+        "is_async_generator",
+        "executor",
+        "cache",
+        "cache_timeout",
+        "coalesce",
+        "timeout",
+        "priority",
+        "max_concurrency",
+        "diff_outputs",
+        "wildcard_outputs",
+        "_has_wildcard_outputs",
+        "_args_mapper",
+        "_outputs_mapper",
+    )
+
+    def __init__(self, callback_id, output, insert_output, multi, outputs_indices, inputs_state_indices,
+                 executor=None, cache=None, cache_timeout=None,
+                 coalesce=None, timeout=None, priority=None, max_concurrency=None,
+                 diff_outputs=None):
+        self.callback_id = callback_id
+        self.output = output
+        self.insert_output = insert_output
+        self.multi = multi
+        self.outputs_indices = outputs_indices
+        self.inputs_state_indices = inputs_state_indices
+        self.using_args_grouping = not isinstance(inputs_state_indices, int) and not _is_flat(inputs_state_indices)
+        self.using_outputs_grouping = not isinstance(outputs_indices, int) and not _is_flat(outputs_indices)
+        self.is_coroutine = False
+        self.is_async_generator = False
+        self.executor = executor
+        self.cache = cache
+        self.cache_timeout = cache_timeout
+        self.coalesce = coalesce
+        self.timeout = timeout
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.diff_outputs = diff_outputs
+        self._args_mapper = self._compile_mapper(inputs_state_indices)
+        self._outputs_mapper = self._compile_mapper(outputs_indices)
+        flat_outputs = insert_output if multi else [insert_output]
+        self.wildcard_outputs = [WildcardOutput(o) if o.has_wildcard() else None for o in flat_outputs]
+        self._has_wildcard_outputs = any(w is not None for w in self.wildcard_outputs)
+
+    @staticmethod
+    def _compile_mapper(indices):
+        # Pick the cheapest equivalent of map_grouping(lambda ind: values[ind], indices).
+        if isinstance(indices, int):
+            return lambda values: values[indices]
+        if _is_flat(indices):
+            n = len(indices)
+            return lambda values: values[:n]
+        return lambda values: map_grouping(lambda ind: values[ind], indices)
+
+    def bind(self, func):
+        """Record the properties of the user function decorated by the callback."""
+        self.is_coroutine = inspect.iscoroutinefunction(func)
+        self.is_async_generator = inspect.isasyncgenfunction(func)
+
+    def args_grouping(self, inputs_state):
+        return self._args_mapper(inputs_state)
+
+    def outputs_grouping(self, outputs_list):
+        return self._outputs_mapper(outputs_list if isinstance(outputs_list, list) else [outputs_list])
+
+    def validate_output_spec(self, output_spec):
+        """Check that the outputs requested match the callback definition, returning for each flat output the
+        stringified ids of a wildcard output (``None`` for the others), which ``WildcardOutput.collect`` takes."""
+        if not self._has_wildcard_outputs:
+            _validate.validate_output_spec(self.insert_output, output_spec, Output)
+            return self.wildcard_outputs
+        outputs = self.insert_output if self.multi else [self.insert_output]
+        specs = output_spec if self.multi else [output_spec]
+        if len(outputs) != len(specs):
+            raise CallbackException("Wrong length output_spec")
+        # Wildcard outputs, which may span thousands of components, are validated and stringified in a single pass
+        _validate.validate_output_spec(
+            [o for o, w in zip(outputs, self.wildcard_outputs) if w is None],
+            [s for s, w in zip(specs, self.wildcard_outputs) if w is None],
+            Output,
+        )
+        return [None if w is None else w.resolve(s) for s, w in zip(specs, self.wildcard_outputs)]
+
+
+_MEMOIZABLE_TYPES = frozenset((str, int))
+
+
+class WildcardOutput:
+    """An output with a pattern-matching id, validating the ids requested against the pattern and stringifying them
+    in a single pass, remembering the stringified ids across requests.
+
+    :param output: The ``Output`` dependency with a wildcard id.
+    :param max_ids: Maximum number of stringified ids remembered.
+    """
+
+    __slots__ = ("property", "keys", "max_ids", "_values", "_fixed", "_ids")
+
+    def __init__(self, output, max_ids=1 << 17):
+        pattern = output.component_id
+        self.property = output.component_property
+        self.keys = tuple(sorted(pattern))
+        self.max_ids = max_ids
+        self._values = operator.itemgetter(*self.keys)
+        self._fixed = tuple((i, pattern[k]) for i, k in enumerate(self.keys) if not isinstance(pattern[k], _Wildcard))
+        # Stringified ids by the values of the id in key order, i.e. a cache of stringify_id. Only ids whose values
+        # are all str or int are remembered: 1, 1.0 and True are equal keys but are stringified differently, and
+        # lists are not hashable.
+        self._ids = {}
+
+    def resolve(self, spec):
+        """Return the stringified ids of the spec, a list for a list spec (``ALL``/``ALLSMALLER``), a single id for a
+        dict (``MATCH``). Raises ``CallbackException`` if the spec does not match the pattern."""
+        prop, size, get_values, fixed, ids = self.property, len(self.keys), self._values, self._fixed, self._ids
+        single = size == 1
+        resolved = []
+        for speci in spec if isinstance(spec, list) else [spec]:
+            id_ = speci["id"]
+            if speci["property"] != prop or not isinstance(id_, dict) or len(id_) != size:
+                raise CallbackException("Output does not match callback definition")
+            try:
+                key = get_values(id_)
+            except KeyError:
+                raise CallbackException("Output does not match callback definition") from None
+            values = (key,) if single else key
+            # A remembered id was validated already, but it may be found for equal values of another type.
+            memoizable = _MEMOIZABLE_TYPES.issuperset(map(type, values))
+            id_str = ids.get(key) if memoizable else None
+            if id_str is None:
+                for i, v in fixed:
+                    if values[i] != v:
+                        raise CallbackException("Output does not match callback definition")
+                id_str = json.dumps(id_, sort_keys=True, separators=(",", ":"))
+                if memoizable:
+                    if len(ids) >= self.max_ids:
+                        ids.clear()
+                    ids[key] = id_str
+            resolved.append(id_str)
+        return resolved if isinstance(spec, list) else resolved[0]
+
+    def collect(self, values, resolved, component_ids):
+        """Add the values (but no-updates) to component_ids under the ids resolved, returning whether there were
+        any updates."""
+        if not isinstance(resolved, list):
+            values, resolved = [values], [resolved]
+        prop = self.property
+        has_update = False
+        for value, id_str in zip(values, resolved):
+            if isinstance(value, NoUpdate):
+                continue
+            entry = component_ids.get(id_str)
+            if entry is None:
+                component_ids[id_str] = {prop: value}
+            else:
+                entry[prop] = value
+            has_update = True
+        return has_update
@@ -0,0 +1,124 @@
+import asyncio
+import concurrent.futures
+import importlib
+import logging
+import pickle
+import time
+
+from quart.utils import run_sync
+
+from async_dash.metrics import record_phase
+from async_dash.profiling import sampled_thread
+
+logger = logging.getLogger(__name__)
+
+EXECUTORS = ("loop", "thread", "process")
+
+
+class CallbackPicklingError(Exception):
+    """Raised when the arguments or the return value of a process executed callback cannot be pickled."""
+
+
+def validate_executor(executor, func=None):
+    if executor is not None and executor not in EXECUTORS:
+        raise ValueError("Invalid callback executor '{}', must be one of {}.".format(executor, EXECUTORS))
+    if executor == "process" and func is not None and "<locals>" in func.__qualname__:
+        raise ValueError(
+            "Callback '{}' cannot run in a process pool, only module level functions can be pickled.".format(
+                func.__qualname__
+            )
+        )
+
+
+def _resolve(module_name, qualname):
+    obj = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    # The module level name refers to the callback wrapper, unwrap to get the user function.
+    while hasattr(obj, "__wrapped__"):
+        obj = obj.__wrapped__
+    return obj
+
+
+def _is_module_level(func):
+    """Whether the worker processes can find ``func`` by its module and qualified name."""
+    try:
+        return _resolve(func.__module__, func.__qualname__) is func
+    except (ImportError, AttributeError):
+        return False
+
+
+def _call_in_process(payload):
+    module_name, qualname, args, kwargs = pickle.loads(payload)
+    result = _resolve(module_name, qualname)(*args, **kwargs)
+    try:
+        return pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        raise CallbackPicklingError(
+            "The return value of callback '{}' cannot be pickled: {!r}".format(qualname, e)
+        ) from None
+
+
+class CallbackExecutor:
+    """Runs synchronous callbacks on the event loop, in the default thread pool or in a managed process pool.
+
+    Coroutine callbacks always run on the event loop. Callbacks executed in a process have no access to
+    ``callback_context``, and their arguments and return value must be picklable.
+
+    :param default: Executor used for callbacks that do not specify one, one of ``"loop"``, ``"thread"`` or
+        ``"process"``.
+    :param process_pool_size: Number of worker processes, defaults to the number of CPUs.
+    """
+
+    def __init__(self, default="thread", process_pool_size=None):
+        validate_executor(default)
+        self.default = default
+        self.process_pool_size = process_pool_size
+        self._process_pool = None
+        self._module_level = {}
+
+    async def run(self, func, executor, args, kwargs):
+        executor = executor or self.default
+        if executor == "loop":
+            return func(*args, **kwargs)
+        if executor == "thread":
+            submitted = time.perf_counter()
+
+            def call():
+                record_phase("executor_wait", submitted)
+                with sampled_thread():
+                    return func(*args, **kwargs)
+
+            return await run_sync(call)()
+        if not self._can_run_in_process(func):
+            return await self.run(func, "thread", args, kwargs)
+        return await self._run_in_process(func, args, kwargs)
+
+    def _can_run_in_process(self, func):
+        # Callbacks choosing the process executor themselves are validated at registration, those running in a
+        # process by default may be closures (e.g. built by a factory, or Dash's long callback wrappers).
+        module_level = self._module_level.get(func)
+        if module_level is None:
+            module_level = self._module_level[func] = _is_module_level(func)
+            if not module_level:
+                logger.warning("Callback '%s' is not a module level function, it runs in a thread instead of a "
+                               "process.", func.__qualname__)
+        return module_level
+
+    async def _run_in_process(self, func, args, kwargs):
+        try:
+            payload = pickle.dumps((func.__module__, func.__qualname__, args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            raise CallbackPicklingError(
+                "The arguments of callback '{}' cannot be pickled: {!r}".format(func.__qualname__, e)
+            ) from None
+        if self._process_pool is None:
+            self._process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.process_pool_size)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._process_pool, _call_in_process, payload)
+        return pickle.loads(result)
+
+    def shutdown(self, wait=True):
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait, cancel_futures=True)
+            self._process_pool = None
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import time
+
+from dash._utils import stringify_id
+from dash._callback import NoUpdate
+from dash.exceptions import PreventUpdate
+
+logger = logging.getLogger(__name__)
+
+
+class Feed:
+    """A value computed by a single producer and pushed to every page subscribed, as an update of ``outputs``.
+
+    The producer runs while the feed has subscribers only. It is either an async generator function, whose yielded
+    values are published as they come, or a function (plain or coroutine) called every ``interval`` seconds. Values
+    are serialized once, whatever the number of subscribers, and a value serialized identically to the previous one
+    is not published again.
+
+    :param name: The name the feed is subscribed to by.
+    :param outputs: An ``Output`` or a list of ``Output`` (without wildcards) the values are sent to. For a list, the
+        values are lists (or tuples) holding a value per output, any of which may be ``no_update``.
+    :param produce: Zero-argument function returning an async iterator of the values.
+    :param dumps: Function serializing a callback response.
+    :param retry: Number of seconds to wait before restarting a producer that raised or ended (e.g. an async
+        generator that returned or raised ``PreventUpdate``) while pages are still subscribed.
+    """
+
+    def __init__(self, name, outputs, produce, dumps, retry=1.0):
+        self.name = name
+        self.outputs = outputs
+        self.produce = produce
+        self.dumps = dumps
+        self.retry = retry
+        self.published = 0
+        self.latest = None
+        self._subscriptions = set()
+        self._task = None
+
+    def response(self, value):
+        """Serialize ``value`` as the callback response updating the outputs, ``None`` if there is nothing to update."""
+        if isinstance(value, NoUpdate):
+            return None
+        multi = isinstance(self.outputs, (list, tuple))
+        pairs = zip(self.outputs, value) if multi else [(self.outputs, value)]
+        components = {}
+        for output, val in pairs:
+            if not isinstance(val, NoUpdate):
+                components.setdefault(stringify_id(output.component_id), {})[output.component_property] = val
+        if not components:
+            return None
+        return self.dumps({"response": components, "multi": True})
+
+    def subscribe(self, subscription):
+        self._subscriptions.add(subscription)
+        if self.latest is not None:
+            subscription.put(self.name, self.latest)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def unsubscribe(self, subscription):
+        self._subscriptions.discard(subscription)
+        if not self._subscriptions and self._task is not None:
+            # Nobody is listening, stop producing. The next subscriber starts over with a fresh value.
+            self._task.cancel()
+            self._task = None
+            self.latest = None
+
+    def publish(self, message):
+        if message == self.latest:
+            return
+        self.latest = message
+        self.published += 1
+        for subscription in self._subscriptions:
+            subscription.put(self.name, message)
+
+    async def _run(self):
+        while True:
+            try:
+                async for value in self.produce():
+                    try:
+                        message = self.response(value)
+                    except Exception as e:  # pylint: disable=broad-except
+                        logger.error("Cannot serialize the value of feed [%s]", self.name, exc_info=e)
+                        continue
+                    if message is not None:
+                        self.publish(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Exception in feed [%s], restarting in %s seconds", self.name, self.retry, exc_info=e)
+            await asyncio.sleep(self.retry)
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    @property
+    def subscribers(self):
+        return len(self._subscriptions)
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+
+def periodic(func, interval, call):
+    """Return a zero-argument function iterating over the values ``call(func)`` returns every ``interval`` seconds.
+
+    Ticks are aligned on the start of the producer: a value taking longer than ``interval`` to compute delays the
+    next one to the following tick rather than piling calls up. Calls raising ``PreventUpdate`` publish nothing.
+    """
+
+    async def produce():
+        start = time.monotonic()
+        while True:
+            try:
+                yield await call(func)
+            except PreventUpdate:
+                pass
+            elapsed = time.monotonic() - start
+            await asyncio.sleep(interval - elapsed % interval)
+
+    return produce
+
+
+def generator(func):
+    """Return a zero-argument function iterating over the values yielded by the async generator function ``func``,
+    skipping the ``PreventUpdate`` it raises (which ends the generator until the producer restarts)."""
+
+    async def produce():
+        try:
+            async for value in func():
+                yield value
+        except PreventUpdate:
+            pass
+
+    return produce
+
+
+class Subscription:
+    """The feeds a page listens to, holding the latest message of each feed not yet sent.
+
+    A page too slow to receive the messages as they are published never holds more than one message per feed: a
+    message not sent yet is replaced by a newer one of the same feed (and counted as ``dropped``). Iterating over the
+    subscription yields the pending messages, waiting for new ones when there are none.
+
+    :param hub: The ``FeedHub`` the feeds belong to.
+    :param names: Names of the feeds subscribed to.
+    """
+
+    def __init__(self, hub, names):
+        self.hub = hub
+        self.names = names
+        self.dropped = 0
+        self._pending = {}
+        self._ready = asyncio.Event()
+
+    def put(self, name, message):
+        if name in self._pending:
+            self.dropped += 1
+            self.hub.dropped += 1
+        self._pending[name] = message
+        self._ready.set()
+
+    async def get(self):
+        """Return the pending messages, waiting until there is at least one."""
+        await self._ready.wait()
+        self._ready.clear()
+        messages = list(self._pending.values())
+        self._pending.clear()
+        return messages
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            for message in await self.get():
+                yield message
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class FeedHub:
+    """The feeds of an app, shared by all the pages subscribed to them."""
+
+    def __init__(self):
+        self.feeds = {}
+        self.sent = 0
+        self.dropped = 0
+
+    def add(self, feed):
+        if feed.name in self.feeds:
+            raise ValueError("Duplicate feed name '{}'.".format(feed.name))
+        self.feeds[feed.name] = feed
+
+    def subscribe(self, names=None):
+        """Subscribe to the feeds named (all the feeds if ``names`` is empty). Raises ``KeyError`` for an unknown
+        name."""
+        feeds = [self.feeds[name] for name in names] if names else list(self.feeds.values())
+        subscription = Subscription(self, [feed.name for feed in feeds])
+        for feed in feeds:
+            feed.subscribe(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        for name in subscription.names:
+            self.feeds[name].unsubscribe(subscription)
+
+    async def stop(self):
+        await asyncio.gather(*[feed.stop() for feed in self.feeds.values()])
+
+    @property
+    def stats(self):
+        return {
+            "feeds": len(self.feeds),
+            "running": sum(1 for feed in self.feeds.values() if feed.running),
+            "subscriptions": sum(feed.subscribers for feed in self.feeds.values()),
+            "published": sum(feed.published for feed in self.feeds.values()),
+            "sent": self.sent,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,186 @@
+import asyncio
+import collections
+import concurrent.futures
+import inspect
+import logging
+import threading
+import time
+import uuid
+
+from dash.long_callback.managers import BaseLongCallbackManager
+
+logger = logging.getLogger(__name__)
+
+
+class JobTerminated(Exception):
+    """Raised by ``set_progress`` when the job has been terminated, to stop a synchronous job early."""
+
+
+class AsyncioLongCallbackManager(BaseLongCallbackManager):
+    """Long callback manager running the jobs in process, keeping progress and results in memory.
+
+    Coroutine callbacks run as tasks on the event loop of the server. Synchronous callbacks run in a thread pool
+    owned by the manager; since threads cannot be killed, a terminated synchronous job keeps running until it
+    returns, or until it reports progress (``set_progress`` then raises ``JobTerminated``). Results are never pickled
+    nor written to disk, and the polling requests of the renderer are answered from memory.
+
+    :param cache_by: A list of zero-argument functions. When provided, caching is enabled and the return values of
+        these functions are combined with the callback function's input arguments and source code to generate cache
+        keys.
+    :param max_workers: Number of threads running synchronous jobs, see ``concurrent.futures.ThreadPoolExecutor``.
+    :param max_results: Maximum number of results kept, the least recently used are dropped first.
+    :param expire: If provided, a result is dropped when it has not been accessed for ``expire`` seconds.
+    """
+
+    def __init__(self, cache_by=None, max_workers=None, max_results=1024, expire=None):
+        super().__init__(cache_by)
+        self.max_workers = max_workers
+        self.max_results = max_results
+        self.expire = expire
+        self.loop = None
+        self._results = collections.OrderedDict()
+        self._progress = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def bind(self, loop):
+        """Run coroutine jobs on ``loop``. Without a loop, they run in a fresh event loop in a pool thread."""
+        self.loop = loop
+
+    def make_job_fn(self, fn, progress, args_deps):
+        if inspect.iscoroutinefunction(fn):
+            async def job_fn(set_progress, user_callback_args):
+                maybe_progress = [set_progress] if progress else []
+                if isinstance(args_deps, dict):
+                    return await fn(*maybe_progress, **user_callback_args)
+                if isinstance(args_deps, (list, tuple)):
+                    return await fn(*maybe_progress, *user_callback_args)
+                return await fn(*maybe_progress, user_callback_args)
+        else:
+            def job_fn(set_progress, user_callback_args):
+                maybe_progress = [set_progress] if progress else []
+                if isinstance(args_deps, dict):
+                    return fn(*maybe_progress, **user_callback_args)
+                if isinstance(args_deps, (list, tuple)):
+                    return fn(*maybe_progress, *user_callback_args)
+                return fn(*maybe_progress, user_callback_args)
+        return job_fn
+
+    def call_job_fn(self, key, job_fn, args):
+        job = uuid.uuid4().hex
+        progress_key = self._make_progress_key(key)
+        terminated = threading.Event()
+
+        def set_progress(progress_value):
+            if terminated.is_set():
+                raise JobTerminated()
+            self._progress[progress_key] = progress_value
+
+        if self.loop is None:
+            try:
+                self.bind(asyncio.get_running_loop())
+            except RuntimeError:
+                pass
+        if inspect.iscoroutinefunction(job_fn):
+            coro = job_fn(set_progress, args)
+            if self.loop is not None and not self.loop.is_closed():
+                future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+            else:
+                future = self._get_pool().submit(asyncio.run, coro)
+        else:
+            future = self._get_pool().submit(job_fn, set_progress, args)
+
+        with self._lock:
+            self._jobs[job] = (future, terminated, key)
+        future.add_done_callback(lambda f: self._done(job, key, f))
+        return job
+
+    def _done(self, job, key, future):
+        with self._lock:
+            _, terminated, _ = self._jobs.pop(job, (None, None, None))
+        if future.cancelled() or terminated is None or terminated.is_set():
+            self._progress.pop(self._make_progress_key(key), None)
+            return
+        error = future.exception()
+        if error is not None:
+            if not isinstance(error, JobTerminated):
+                logger.error("Exception in long callback job", exc_info=error)
+            self._progress.pop(self._make_progress_key(key), None)
+            return
+        with self._lock:
+            self._results[key] = future.result(), time.monotonic()
+            self._results.move_to_end(key)
+            self._prune()
+
+    def _prune(self):
+        # The progress of a job is kept until its result is retrieved, or dropped.
+        if self.expire is not None:
+            deadline = time.monotonic() - self.expire
+            while self._results and next(iter(self._results.values()))[1] < deadline:
+                self._progress.pop(self._make_progress_key(self._results.popitem(last=False)[0]), None)
+        while self.max_results is not None and len(self._results) > self.max_results:
+            self._progress.pop(self._make_progress_key(self._results.popitem(last=False)[0]), None)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="async-dash-long-callback"
+                )
+            return self._pool
+
+    def terminate_job(self, job):
+        if job is None:
+            return
+        with self._lock:
+            future, terminated, key = self._jobs.get(job, (None, None, None))
+        if future is not None:
+            terminated.set()
+            future.cancel()
+            self._progress.pop(self._make_progress_key(key), None)
+
+    def terminate_unhealthy_job(self, job):
+        # Jobs run in process, they cannot end up in a state the manager does not know about.
+        return False
+
+    def job_running(self, job):
+        with self._lock:
+            future, terminated, _ = self._jobs.get(job, (None, None, None))
+        return future is not None and not future.done() and not terminated.is_set()
+
+    def get_progress(self, key):
+        return self._progress.get(self._make_progress_key(key))
+
+    def result_ready(self, key):
+        with self._lock:
+            self._prune()
+            return key in self._results
+
+    def get_result(self, key, job):
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return None
+            if self.cache_by is None:
+                del self._results[key]
+            else:
+                self._results[key] = entry[0], time.monotonic()
+                self._results.move_to_end(key)
+        self._progress.pop(self._make_progress_key(key), None)
+        self.terminate_job(job)
+        return entry[0]
+
+    def clear_cache_entry(self, key):
+        with self._lock:
+            self._results.pop(key, None)
+        self._progress.pop(self._make_progress_key(key), None)
+
+    def shutdown(self, wait=True):
+        """Terminate the running jobs and stop the thread pool."""
+        with self._lock:
+            jobs, pool, self._pool = list(self._jobs), self._pool, None
+        for job in jobs:
+            self.terminate_job(job)
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,164 @@
+import asyncio
+import bisect
+import collections
+import time
+
+from async_dash.monkey_patch_callback_context import callback_globals
+
+# Phases of a callback invocation, in the order they happen:
+#   parse          decoding the request body
+#   prepare        extracting the inputs and the callback context from the request
+#   queue          waiting for admission (see async_dash.admission)
+#   executor_wait  waiting for a thread (or process) of the executor to run a synchronous callback in
+#   validate       validating the outputs spec and grouping the arguments
+#   execute        the callback function itself
+#   serialize      serializing the response
+PHASES = ("parse", "prepare", "queue", "executor_wait", "validate", "execute", "serialize")
+OUTCOMES = ("ok", "cached", "prevented", "cancelled", "error", "timeout", "rejected")
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def record_phase(name, start):
+    """Add the time elapsed since ``start`` (a ``time.perf_counter()`` value) to a phase of the running callback
+    invocation. Does nothing unless metrics are enabled."""
+    g = callback_globals.get()
+    phases = None if g is None else g.get("phases")
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus sense, counts per upper bound plus the sum of all observations."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        """Yield the lines of the Prometheus text format for the histogram."""
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield "{}_bucket{{{}le=\"{}\"}} {}".format(name, labels, le, cumulative)
+        labels = "{{{}}}".format(labels.rstrip(",")) if labels else ""
+        yield "{}_sum{} {}".format(name, labels, self.sum)
+        yield "{}_count{} {}".format(name, labels, self.count)
+
+
+class CallbackMetrics:
+    """Per-callback latency histograms by phase, outcome counters and response size histograms, plus the event loop
+    lag. Recording is a handful of dictionary operations per invocation, cheap enough to leave on in production."""
+
+    def __init__(self):
+        self.phases = collections.defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.latency = collections.defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.response_size = collections.defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.outcomes = collections.Counter()
+        self.loop_lag = Histogram(LATENCY_BUCKETS)
+        self.gauges = {}
+
+    def observe(self, callback_id, outcome, duration, phases, size=None):
+        """Record an invocation. ``callback_id`` is used as a label as is, it must come from a bounded set (e.g. the
+        registered callbacks) to keep the number of series bounded."""
+        self.outcomes[callback_id, outcome] += 1
+        self.latency[callback_id].observe(duration)
+        for phase, value in phases.items():
+            self.phases[callback_id, phase].observe(value)
+        if size is not None:
+            self.response_size[callback_id].observe(size)
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP async_dash_callback_calls_total Callback invocations by outcome.",
+            "# TYPE async_dash_callback_calls_total counter",
+        ]
+        for (callback_id, outcome), count in sorted(self.outcomes.items(), key=_by_labels):
+            lines.append("async_dash_callback_calls_total{{{}outcome=\"{}\"}} {}".format(
+                _label(callback_id), outcome, count))
+        lines += [
+            "# HELP async_dash_callback_duration_seconds Duration of callback invocations.",
+            "# TYPE async_dash_callback_duration_seconds histogram",
+        ]
+        for callback_id, histogram in sorted(self.latency.items(), key=_by_labels):
+            lines.extend(histogram.samples("async_dash_callback_duration_seconds", _label(callback_id)))
+        lines += [
+            "# HELP async_dash_callback_phase_seconds Duration of the phases of callback invocations.",
+            "# TYPE async_dash_callback_phase_seconds histogram",
+        ]
+        for (callback_id, phase), histogram in sorted(self.phases.items(), key=_by_labels):
+            labels = "{}phase=\"{}\",".format(_label(callback_id), phase)
+            lines.extend(histogram.samples("async_dash_callback_phase_seconds", labels))
+        lines += [
+            "# HELP async_dash_callback_response_bytes Size of callback responses.",
+            "# TYPE async_dash_callback_response_bytes histogram",
+        ]
+        for callback_id, histogram in sorted(self.response_size.items(), key=_by_labels):
+            lines.extend(histogram.samples("async_dash_callback_response_bytes", _label(callback_id)))
+        lines += [
+            "# HELP async_dash_event_loop_lag_seconds Delay of the event loop in running a scheduled callback.",
+            "# TYPE async_dash_event_loop_lag_seconds histogram",
+        ]
+        lines.extend(self.loop_lag.samples("async_dash_event_loop_lag_seconds", ""))
+        for name, (description, value) in sorted(self.gauges.items()):
+            lines += ["# HELP {} {}".format(name, description), "# TYPE {} gauge".format(name),
+                      "{} {}".format(name, value())]
+        return "\n".join(lines) + "\n"
+
+
+def _by_labels(item):
+    # Compare label values as strings, whatever was recorded.
+    key = item[0]
+    return tuple(str(k) for k in key) if isinstance(key, tuple) else (str(key),)
+
+
+def _label(callback_id):
+    escaped = str(callback_id).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "callback=\"{}\",".format(escaped)
+
+
+class LoopLagMonitor:
+    """Samples the event loop lag, i.e. how late a sleep of ``interval`` seconds wakes up. A large lag means that
+    something blocks the loop, e.g. a synchronous callback running with ``executor="loop"``.
+
+    :param histogram: Histogram the lag is recorded in.
+    :param interval: Number of seconds between samples.
+    """
+
+    def __init__(self, histogram, interval=0.5):
+        self.histogram = histogram
+        self.interval = interval
+        self.last = 0.0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.last = max(0.0, loop.time() - start - self.interval)
+            self.histogram.observe(self.last)
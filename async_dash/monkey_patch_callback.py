@@ -1,11 +1,35 @@
+import time
+from functools import wraps
+
 import dash._callback as cb
 from dash._callback import handle_grouped_callback_args, Output, flatten_grouping, make_grouping_by_index, \
     grouping_len, insert_callback, _validate, PreventUpdate, NoUpdate, collections, stringify_id, to_json
 
+from async_dash.admission import validate_priority
+from async_dash.diffing import SerializedProps
+from async_dash.dispatch_plan import DispatchPlan
+from async_dash.executors import validate_executor
+from async_dash.metrics import record_phase
+
 
 def register_callback(
         callback_list, callback_map, config_prevent_initial_callbacks, *_args, **_kwargs
 ):
+    # region ASYNC: Pop the async-dash specific callback options before handing the arguments to Dash
+
+    executor = _kwargs.pop("executor", None)
+    validate_executor(executor)
+    cache = _kwargs.pop("cache", None)
+    cache_timeout = _kwargs.pop("cache_timeout", None)
+    coalesce = _kwargs.pop("coalesce", None)
+    timeout = _kwargs.pop("timeout", None)
+    priority = _kwargs.pop("priority", None)
+    validate_priority(priority)
+    max_concurrency = _kwargs.pop("max_concurrency", None)
+    diff_outputs = _kwargs.pop("diff_outputs", None)
+
+    # endregion
+
     (
         output,
         flat_inputs,
@@ -34,32 +58,29 @@ def register_callback(
         inputs_state_indices,
         prevent_initial_call,
     )
+    # ASYNC: Compile everything that is fixed per callback once, instead of on every dispatch
+    plan = callback_map[callback_id]["plan"] = DispatchPlan(
+        callback_id, output, insert_output, multi, output_indices, inputs_state_indices, executor=executor,
+        cache=cache, cache_timeout=cache_timeout, coalesce=coalesce, timeout=timeout, priority=priority,
+        max_concurrency=max_concurrency, diff_outputs=diff_outputs
+    )
 
     # pylint: disable=too-many-locals
     def wrap_func(func):
-        @wraps(func)
-        async def add_context(*args, **kwargs):  # ASYNC: Change from def "add_context(*args, **kwargs)"
-            output_spec = kwargs.pop("outputs_list")
-            _validate.validate_output_spec(insert_output, output_spec, Output)
-
-            func_args, func_kwargs = _validate.validate_and_group_input_args(
-                args, inputs_state_indices
-            )
-
-            # region ASYNC: Added iscoroutinefunction check
-
-            # don't touch the comment on the next line - used by debugger
-            if inspect.iscoroutinefunction(func):
-                output_value = await func(
-                    *func_args, **func_kwargs
-                )  # %% callback invoked %%
-            else:
-                output_value = func(*func_args, **func_kwargs)  # %% callback invoked %%
-
-            # endregion
-
+        plan.bind(func)
+        is_coroutine = plan.is_coroutine
+        is_async_generator = plan.is_async_generator
+        if (is_coroutine or is_async_generator) and executor is not None:
+            raise ValueError("The executor of callback '{}' cannot be set, coroutines always run on the event "
+                             "loop.".format(func.__qualname__))
+        validate_executor(executor, func)
+
+        def collect_updates(output_value, output_spec, component_ids, resolved):
+            """Add the updates held by a return value of the callback to component_ids, returning the (normalized)
+            return value and whether there were any updates. ``resolved`` holds the stringified ids of the wildcard
+            outputs, see ``DispatchPlan.validate_output_spec``."""
             if isinstance(output_value, NoUpdate):
-                raise PreventUpdate
+                return output_value, False
 
             if not multi:
                 output_value, output_spec = [output_value], [output_spec]
@@ -77,11 +98,14 @@ def register_callback(
                 output_spec, flat_output_values, callback_id
             )
 
-            component_ids = collections.defaultdict(dict)
             has_update = False
-            for val, spec in zip(flat_output_values, output_spec):
+            for val, spec, wildcard, ids in zip(flat_output_values, output_spec, plan.wildcard_outputs, resolved):
                 if isinstance(val, NoUpdate):
                     continue
+                if wildcard is not None:
+                    # ASYNC: Collect the (possibly thousands of) matched ids without stringifying them again
+                    has_update = wildcard.collect(val, ids, component_ids) or has_update
+                    continue
                 for vali, speci in (
                         zip(val, spec) if isinstance(spec, list) else [[val, spec]]
                 ):
@@ -90,18 +114,107 @@ def register_callback(
                         id_str = stringify_id(speci["id"])
                         component_ids[id_str][speci["property"]] = vali
 
-            if not has_update:
-                raise PreventUpdate
+            return output_value, has_update
 
+        def serialize(component_ids, output_value, serializer, diff=False):
             response = {"response": component_ids, "multi": True}
+            dumps = to_json if serializer is None else serializer.dumps
 
+            start = time.perf_counter()
             try:
-                jsonResponse = to_json(response)
+                if diff:
+                    # ASYNC: Serialize prop by prop, so that unchanged props can be dropped per session
+                    jsonResponse = SerializedProps([
+                        (id_str, prop, dumps(value))
+                        for id_str, props in component_ids.items() for prop, value in props.items()
+                    ])
+                else:
+                    jsonResponse = dumps(response)
             except TypeError:
                 _validate.fail_callback_output(output_value, output)
+            record_phase("serialize", start)
 
             return jsonResponse
 
+        async def stream_updates(generator, output_spec, resolved, serializer):
+            # ASYNC: Serialize each value yielded by an async generator callback as a partial update
+            try:
+                async for output_value in generator:
+                    component_ids = collections.defaultdict(dict)
+                    output_value, has_update = collect_updates(output_value, output_spec, component_ids, resolved)
+                    if has_update:
+                        yield serialize(component_ids, output_value, serializer)
+            finally:
+                await generator.aclose()
+
+        @wraps(func)
+        async def add_context(*args, **kwargs):  # ASYNC: Change from def "add_context(*args, **kwargs)"
+            output_spec = kwargs.pop("outputs_list")
+            callback_executor = kwargs.pop("executor", None)  # ASYNC: Executor for synchronous callbacks
+            serializer = kwargs.pop("serializer", None)  # ASYNC: Pluggable response serialization
+            stream = kwargs.pop("stream", False)  # ASYNC: Return partial updates of async generators as they come
+            detector = kwargs.pop("detector", None)  # ASYNC: Detect coroutines blocking the event loop
+            diff = kwargs.pop("diff", False)  # ASYNC: Serialize prop by prop for diffing
+            start = time.perf_counter()
+            resolved = plan.validate_output_spec(output_spec)
+
+            func_args, func_kwargs = _validate.validate_and_group_input_args(
+                args, inputs_state_indices
+            )
+            record_phase("validate", start)
+            start = time.perf_counter()
+
+            # region ASYNC: Added async generator support, streamed or merged into a single response
+
+            if is_async_generator:
+                # don't touch the comment on the next line - used by debugger
+                generator = func(*func_args, **func_kwargs)  # %% callback invoked %%
+                if stream:
+                    return stream_updates(generator, output_spec, resolved, serializer)
+                component_ids = collections.defaultdict(dict)
+                has_update = False
+                async for output_value in generator:
+                    output_value, has_update_i = collect_updates(output_value, output_spec, component_ids, resolved)
+                    has_update = has_update or has_update_i
+                record_phase("execute", start)
+                if not has_update:
+                    raise PreventUpdate
+                return serialize(component_ids, output_value, serializer, diff)
+
+            # endregion
+
+            # region ASYNC: Added coroutine check (resolved once at registration)
+
+            # don't touch the comment on the next line - used by debugger
+            if is_coroutine and detector is not None:
+                output_value = await detector.run(
+                    callback_id, func, func_args, func_kwargs
+                )  # %% callback invoked %%
+            elif is_coroutine:
+                output_value = await func(
+                    *func_args, **func_kwargs
+                )  # %% callback invoked %%
+            elif callback_executor is not None:
+                output_value = await callback_executor.run(
+                    func, executor, func_args, func_kwargs
+                )  # %% callback invoked %%
+            else:
+                output_value = func(*func_args, **func_kwargs)  # %% callback invoked %%
+            record_phase("execute", start)
+
+            # endregion
+
+            if isinstance(output_value, NoUpdate):
+                raise PreventUpdate
+
+            component_ids = collections.defaultdict(dict)
+            output_value, has_update = collect_updates(output_value, output_spec, component_ids, resolved)
+
+            if not has_update:
+                raise PreventUpdate
+
+            return serialize(component_ids, output_value, serializer, diff)
+
         callback_map[callback_id]["callback"] = add_context
 
         return add_context
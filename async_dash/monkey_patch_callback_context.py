@@ -1,7 +1,44 @@
+import contextvars
+import types
+
 import flask
 import quart
 
+# The per-invocation callback state (what Dash keeps on flask.g). A context variable rather than quart.g, so that
+# callbacks running concurrently within the same request (batch dispatch) cannot overwrite each other's context.
+callback_globals = contextvars.ContextVar("callback_globals", default=None)
+
+
+class CallbackGlobals(types.SimpleNamespace):
+    """Namespace holding the state of a single callback invocation, i.e. what ``callback_context`` reads."""
+
+    def get(self, name, default=None):
+        return self.__dict__.get(name, default)
+
+
+class _GlobalsProxy:
+    """Stand-in for ``flask.g`` resolving to the active callback invocation, falling back to ``quart.g``."""
+
+    @staticmethod
+    def _target():
+        g = callback_globals.get()
+        return quart.g if g is None else g
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._target(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._target(), name)
+
+
+def has_request_context():
+    return callback_globals.get() is not None or quart.has_request_context()
+
+
 def apply():
     # Patch flask object to avoid rewriting Dash code. Alternative, we could rewrite it.
-    flask.g = quart.g
-    flask.has_request_context = quart.has_request_context
\ No newline at end of file
+    flask.g = _GlobalsProxy()
+    flask.has_request_context = has_request_context
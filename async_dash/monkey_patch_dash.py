@@ -2,17 +2,41 @@ import dash
 import flask
 import quart
 import mimetypes
-import pkgutil
 import sys
 import asyncio
+import collections
+import hashlib
 import inspect
+import json
+import threading
+import time
+import uuid
 
-from dash import _validate
-from dash._grouping import map_grouping, grouping_len
+from dash import _validate, html
+from dash.dependencies import Output
 from dash._utils import inputs_to_dict, split_callback_id, inputs_to_vals
 from dash.fingerprint import check_fingerprint
 from dash.dash import _default_index
+from dash.exceptions import PreventUpdate
 from quart.utils import run_sync
+from quart.wrappers.response import IterableBody
+from werkzeug.exceptions import InternalServerError
+
+from async_dash.admission import AdmissionController, OverloadedError
+from async_dash.asset_cache import AssetCache
+from async_dash.blocking import BlockingDetector
+from async_dash.caching import MemoryCallbackCache, invocation_key
+from async_dash.cancellation import InFlightCallbacks, SupersededError, supersession_key
+from async_dash.client import BATCH_SCRIPT, FEED_SCRIPT, SESSION_SCRIPT, STREAM_SCRIPT, WEBSOCKET_SCRIPT
+from async_dash.coalescing import SingleFlight
+from async_dash.diffing import OutputDiffer, SerializedProps
+from async_dash.executors import CallbackExecutor
+from async_dash.feeds import Feed, FeedHub, generator, periodic
+from async_dash.long_callback import AsyncioLongCallbackManager
+from async_dash.metrics import CallbackMetrics, LoopLagMonitor, record_phase
+from async_dash.profiling import SlowCallbackProfiler, sampled_task
+from async_dash.serializers import PlotlySerializer
+from async_dash.monkey_patch_callback_context import CallbackGlobals, callback_globals
 
 
 # borrowed from dash-devices
@@ -22,6 +46,34 @@ def exception_handler(loop, context):
         exception = context["exception"]
         # Route the exception through sys.excepthook
         sys.excepthook(exception.__class__, exception, exception.__traceback__)
+    else:
+        # ASYNC: Log everything else, e.g. the callbacks reported by the blocking detector
+        loop.default_exception_handler(context)
+
+
+def _item_json(status, data, fields=""):
+    # Assemble from the already serialized callback response, rather than parsing and serializing it again.
+    if data is None:
+        return '{{{}"status":{}}}'.format(fields, status)
+    return '{{{}"status":{},"body":{}}}'.format(fields, status, data)
+
+
+def _conditional_json(data, tag):
+    if '"{}"'.format(tag) == quart.request.headers.get("If-None-Match"):
+        return quart.Response("", status=304)
+    response = quart.Response(data, mimetype="application/json")
+    response.set_etag(tag)
+    return response
+
+
+async def _ndjson(g, updates):
+    # The body is sent after the dispatch returned, restore the callback context while iterating.
+    token = callback_globals.set(g)
+    try:
+        async for update in updates:
+            yield (update if isinstance(update, bytes) else update.encode("utf-8")) + b"\n"
+    finally:
+        callback_globals.reset(token)
 
 
 original_dash = dash.Dash
@@ -171,7 +223,155 @@ class Dash(original_dash):
 
      :param long_callback_manager: Long callback manager instance to support the
      ``@app.long_callback`` decorator. Currently an instance of one of
-     ``DiskcacheLongCallbackManager`` or ``CeleryLongCallbackManager``
+     ``AsyncioLongCallbackManager``, ``DiskcacheLongCallbackManager`` or
+     ``CeleryLongCallbackManager``
+
+     :param component_suites_cache_size: Maximum number of bytes of component
+         suite resources (including their pre-compressed variants) to keep in
+         memory. Resources are read and compressed off the event loop on first
+         request and served from memory afterwards. Default 128 MiB, set to
+         ``None`` for no limit or ``0`` to read every request from disk.
+     :type component_suites_cache_size: int or None
+
+     :param batch_callbacks: Default ``False``. If ``True``, callbacks requested
+         by the renderer at the same time are sent in a single request to
+         ``_dash-update-component-batch`` and executed concurrently.
+     :type batch_callbacks: boolean
+
+     :param websocket_callbacks: Default ``False``. If ``True``, the renderer
+         keeps a websocket open to ``_dash-update-component-ws`` and sends all
+         callback invocations over it instead of issuing a request for each.
+         Headers set through ``callback_context.response`` are not delivered
+         over the websocket. Falls back to plain requests if the websocket
+         cannot be opened. Supersedes ``batch_callbacks``.
+     :type websocket_callbacks: boolean
+
+     :param stream_callbacks: Default ``False``. If ``True``, the renderer
+         asks for the values yielded by async generator callbacks to be
+         streamed as they come (as newline delimited JSON), and applies each
+         of them to the page as a partial update. The merged result of all
+         updates is then processed as a regular callback response. Without
+         streaming, async generator callbacks respond with the merged result
+         once the generator is exhausted.
+     :type stream_callbacks: boolean
+
+     :param cancel_superseded_callbacks: Default ``False``. If ``True``, an
+         invocation of a callback is cancelled when the same page invokes it
+         again for the same outputs before it completed, e.g. while dragging a
+         slider. Invocations are always cancelled when the client disconnects.
+     :type cancel_superseded_callbacks: boolean
+
+     :param callback_timeout: Number of seconds after which callbacks that do
+         not specify a ``timeout`` themselves are cancelled, answering with a
+         504 response. Default ``None``, no timeout. Cancelled coroutines
+         receive ``asyncio.CancelledError``, callbacks running in a thread
+         cannot be interrupted and should poll ``async_dash.is_cancelled()``.
+     :type callback_timeout: float
+
+     :param diff_callback_outputs: Default ``False``. If ``True``, remember per
+         page a digest of the last value sent for each output prop, and leave
+         out the props whose value did not change from the responses.
+         Callbacks can override it with ``diff_outputs``. Not suited for
+         outputs the user can change, such as the ``value`` of an input.
+     :type diff_callback_outputs: boolean
+
+     :param diff_max_sessions: Maximum number of pages for which the output
+         digests are remembered, the least recently active are dropped first.
+         Default ``1024``.
+     :type diff_max_sessions: int
+
+     :param max_concurrent_callbacks: Maximum number of callback invocations
+         executing concurrently, ``None`` (default) for no limit. Callbacks can
+         limit their own concurrency with ``max_concurrency``. Invocations
+         beyond the limits wait in a queue, ordered by the ``priority``
+         (``"high"``, ``"normal"`` or ``"low"``) of their callback.
+     :type max_concurrent_callbacks: int
+
+     :param max_queued_callbacks: Maximum number of invocations waiting to
+         execute, ``None`` (default) for no limit. Invocations arriving while
+         the queue is full are rejected with a 503 response.
+     :type max_queued_callbacks: int
+
+     :param overload_retry_after: Number of seconds sent in the Retry-After
+         header of 503 responses. Default ``1``.
+     :type overload_retry_after: int
+
+     :param metrics: Default ``False``. If ``True``, record per callback
+         latency histograms split by phase (parsing, preparation, admission,
+         executor wait, validation, execution and serialization), invocation
+         counts by outcome, response sizes and the event loop lag, see
+         ``Dash.metrics``.
+     :type metrics: boolean
+
+     :param metrics_endpoint: Route (below ``routes_pathname_prefix``) serving
+         the metrics in the Prometheus text format, e.g. ``"_dash-metrics"``.
+         Default ``None``, no endpoint. Setting it enables ``metrics``.
+     :type metrics_endpoint: string
+
+     :param slow_callback_threshold: Number of seconds from which invocations
+         are considered slow. If set, a sampling profiler records where slow
+         invocations spend their time, see ``Dash.slow_callbacks``. Default
+         ``None``, no profiling.
+     :type slow_callback_threshold: float
+
+     :param blocking_threshold: Number of seconds a coroutine callback may hold
+         the event loop, e.g. by calling blocking code instead of awaiting.
+         If set, callbacks exceeding it are reported with a snapshot of their
+         stack through the exception handler of the loop, see also
+         ``Dash.blocking_callbacks``. Default ``None``, no detection.
+     :type blocking_threshold: float
+
+     :param offload_blocking_callbacks: Default ``False``. If ``True``, later
+         invocations of coroutine callbacks reported as blocking run in a
+         fresh event loop in a worker thread. Requires ``blocking_threshold``.
+     :type offload_blocking_callbacks: boolean
+
+     :param feed_transport: How pages receive the values of the feeds
+         registered with ``Dash.feed``: ``"sse"`` (default) as server-sent
+         events from ``_dash-feeds``, or ``"websocket"`` over a websocket to
+         ``_dash-feeds-ws``.
+     :type feed_transport: string
+
+     :param feed_heartbeat: Number of seconds after which an idle feed
+         connection is sent a keep-alive message, so that proxies do not close
+         it and disconnected pages are noticed. Default ``15``.
+     :type feed_heartbeat: float
+
+     :param callback_executor: Where synchronous callbacks are executed unless
+         they specify ``executor`` themselves: ``"thread"`` (default) in the
+         default thread pool, ``"process"`` in a managed process pool, or
+         ``"loop"`` directly on the event loop. Process executed callbacks
+         must be module level functions with picklable arguments and return
+         values, and have no access to ``callback_context``.
+     :type callback_executor: string
+
+     :param process_pool_size: Number of worker processes of the pool used by
+         ``"process"`` callbacks. Defaults to the number of CPUs.
+     :type process_pool_size: int
+
+     :param callback_cache: The ``CallbackCache`` memoizing the responses of
+         callbacks registered with ``cache=True``. Defaults to an in-process
+         ``MemoryCallbackCache``, use a ``FileCallbackCache`` to share entries
+         between workers. Callbacks may also pass a cache instance of their
+         own as ``cache``, and override its expiry with ``cache_timeout``.
+         Only the response body is memoized, headers set through
+         ``callback_context.response`` are not.
+     :type callback_cache: CallbackCache
+
+     :param coalesce_callbacks: Default ``False``. If ``True``, an invocation
+         identical (same callback, inputs, state and triggers) to one already
+         in flight awaits the response of the latter instead of executing the
+         callback again. Callbacks can override this with ``coalesce``. Only
+         enable it for callbacks without side effects; headers set through
+         ``callback_context.response`` only reach the first caller.
+     :type coalesce_callbacks: boolean
+
+     :param serializer: The ``Serializer`` parsing callback requests and
+         serializing callback responses. Defaults to ``PlotlySerializer``,
+         i.e. plotly's ``to_json``. ``OrjsonSerializer`` encodes NumPy arrays
+         and pandas objects natively, falling back to ``to_json`` for
+         anything it does not support.
+     :type serializer: Serializer
      """
 
     def __init__(self,
@@ -200,12 +400,231 @@ class Dash(original_dash):
                  title="Dash",
                  update_title="Updating...",
                  long_callback_manager=None,
+                 component_suites_cache_size=128 * 1024 * 1024,
+                 batch_callbacks=False,
+                 websocket_callbacks=False,
+                 stream_callbacks=False,
+                 cancel_superseded_callbacks=False,
+                 callback_timeout=None,
+                 diff_callback_outputs=False,
+                 diff_max_sessions=1024,
+                 max_concurrent_callbacks=None,
+                 max_queued_callbacks=None,
+                 overload_retry_after=1,
+                 metrics=False,
+                 metrics_endpoint=None,
+                 slow_callback_threshold=None,
+                 blocking_threshold=None,
+                 offload_blocking_callbacks=False,
+                 feed_transport="sse",
+                 feed_heartbeat=15,
+                 callback_executor="thread",
+                 process_pool_size=None,
+                 callback_cache=None,
+                 coalesce_callbacks=False,
+                 serializer=None,
                  **obsolete):
+        self._component_suites_cache = AssetCache(max_size=component_suites_cache_size)
+        self._batch_callbacks = batch_callbacks
+        self._websocket_callbacks = websocket_callbacks
+        self._callback_executor = CallbackExecutor(callback_executor, process_pool_size)
+        self._callback_cache = callback_cache
+        self._coalesce_callbacks = coalesce_callbacks
+        self._single_flight = SingleFlight()
+        self._serializer = serializer or PlotlySerializer()
+        self._cancel_superseded_callbacks = cancel_superseded_callbacks
+        self._callback_timeout = callback_timeout
+        self._in_flight_callbacks = InFlightCallbacks()
+        self._diff_callback_outputs = diff_callback_outputs
+        self._output_differ = OutputDiffer(diff_max_sessions)
+        self._layout_is_coroutine = False
+        self._layout_json = None
+        self._dependencies_json = None
+        self._awaited_layout = None
+        self._admission = AdmissionController(max_concurrent_callbacks, max_queued_callbacks)
+        self._overload_retry_after = overload_retry_after
+        self._metrics = CallbackMetrics() if metrics or metrics_endpoint else None
+        self._metrics_endpoint = metrics_endpoint
+        self._loop_lag_monitor = None if self._metrics is None else LoopLagMonitor(self._metrics.loop_lag)
+        self._profiler = None if slow_callback_threshold is None else SlowCallbackProfiler(slow_callback_threshold)
+        self._blocking_detector = None if blocking_threshold is None else BlockingDetector(
+            blocking_threshold, offload_blocking_callbacks
+        )
+        if feed_transport not in ("sse", "websocket"):
+            raise ValueError("Invalid feed_transport '{}', expected 'sse' or 'websocket'.".format(feed_transport))
+        self._feeds = FeedHub()
+        self._feed_transport = feed_transport
+        self._feed_heartbeat = feed_heartbeat
         super().__init__(name, server, assets_folder, assets_url_path, assets_ignore, assets_external_path,
                          eager_loading, include_assets_files, url_base_pathname, requests_pathname_prefix,
                          routes_pathname_prefix, serve_locally, compress, meta_tags, index_string, external_scripts,
                          external_stylesheets, suppress_callback_exceptions, prevent_initial_callbacks, show_undo_redo,
                          extra_hot_reload_paths, plugins, title, update_title, long_callback_manager, **obsolete)
+        if websocket_callbacks:
+            self._inline_scripts.append(WEBSOCKET_SCRIPT)
+        elif batch_callbacks:
+            self._inline_scripts.append(BATCH_SCRIPT)
+        if stream_callbacks:
+            self._inline_scripts.append(STREAM_SCRIPT)
+        if self._metrics is not None:
+            self._metrics.gauges.update({
+                "async_dash_callbacks_running": ("Callback invocations executing.", lambda: self._admission.running),
+                "async_dash_callbacks_queued": ("Callback invocations waiting for admission.",
+                                                lambda: self._admission.queued),
+                "async_dash_event_loop_lag_last_seconds": ("Last sampled event loop lag.",
+                                                           lambda: self._loop_lag_monitor.last),
+                "async_dash_feed_subscriptions": ("Feed subscriptions of the connected pages.",
+                                                  lambda: self._feeds.stats["subscriptions"]),
+            })
+        if cancel_superseded_callbacks or diff_callback_outputs:
+            # Installed last, so that the session header is passed to the transports installed before.
+            self._inline_scripts.append(SESSION_SCRIPT)
+
+    def init_app(self, app=None, **kwargs):
+        super().init_app(app, **kwargs)
+        if self._batch_callbacks:
+            self._add_url("_dash-update-component-batch", self.dispatch_batch, ["POST"])
+        if self._websocket_callbacks:
+            self._add_websocket("_dash-update-component-ws", self.dispatch_websocket)
+        self.server.after_serving(self._shutdown_callback_executor)
+        if self._metrics_endpoint:
+            self._add_url(self._metrics_endpoint, self.serve_metrics)
+        if self._loop_lag_monitor is not None:
+            self.server.before_serving(self._loop_lag_monitor.start)
+            self.server.after_serving(self._loop_lag_monitor.stop)
+        if self._blocking_detector is not None:
+            self.server.after_serving(self._blocking_detector.stop)
+        if isinstance(self._long_callback_manager, AsyncioLongCallbackManager):
+            self.server.after_serving(run_sync(self._long_callback_manager.shutdown))
+        self._add_url("_dash-feeds", self.serve_feeds)
+        self._add_websocket("_dash-feeds-ws", self.serve_feeds_websocket)
+        self.server.after_serving(self._feeds.stop)
+
+    def _add_websocket(self, name, view_func):
+        full_name = self.config.routes_pathname_prefix + name
+        self.server.add_websocket(full_name, endpoint=full_name, view_func=view_func)
+        self.routes.append(full_name)
+
+    async def _shutdown_callback_executor(self):
+        await run_sync(self._callback_executor.shutdown)()
+
+    async def serve_metrics(self):
+        return quart.Response(self._metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @property
+    def metrics(self):
+        """The ``CallbackMetrics`` recorded if ``metrics`` is enabled, else ``None``."""
+        return self._metrics
+
+    @property
+    def slow_callbacks(self):
+        """The slow invocations recorded by the profiler (most recent last), each a dict holding the ``callback``,
+        its ``duration``, the ``time`` it completed and the ``samples`` per collapsed stack, most frequent first."""
+        return [] if self._profiler is None else list(self._profiler.records)
+
+    @property
+    def blocking_callbacks(self):
+        """The reports of coroutine callbacks that blocked the event loop (most recent last), each a dict holding the
+        ``callback``, the ``time`` it was detected and the ``stack`` of the event loop thread at that time."""
+        return [] if self._blocking_detector is None else list(self._blocking_detector.reports)
+
+    def feed(self, output, interval=None, name=None):
+        """Register a shared feed: a single producer computing values which are pushed to every page, as updates of
+        ``output``, instead of each page polling a callback (e.g. triggered by a ``dcc.Interval``).
+
+        The decorated function is either an async generator function, whose yielded values are pushed as they come,
+        or a function (plain or coroutine) called every ``interval`` seconds. Plain functions run on the callback
+        executor. The producer only runs while pages are connected, it is restarted (after a second) if it raises or
+        the generator ends. Values are serialized once whatever the number of pages. A page too slow to keep up only
+        receives the latest value of a feed.
+
+        Values are applied to the layout directly, they do not trigger the callbacks depending on ``output``.
+
+        :param output: An ``Output``, or a list of ``Output`` in which case the values are lists holding a value per
+            output. Outputs cannot have pattern-matching ids. Values (or their items) may be ``no_update``.
+        :param interval: Number of seconds between calls of a function, ignored for async generator functions.
+        :param name: The name of the feed, defaults to the name of the function. Pages subscribe to all the feeds,
+            ``_dash-feeds`` (and ``_dash-feeds-ws``) accept ``feed`` query parameters to subscribe to some only.
+        """
+        for output_i in output if isinstance(output, (list, tuple)) else [output]:
+            if not isinstance(output_i, Output) or output_i.has_wildcard():
+                raise ValueError("Feed outputs must be Output dependencies without pattern-matching ids, got "
+                                 "{!r}.".format(output_i))
+
+        def wrap(func):
+            if inspect.isasyncgenfunction(func):
+                produce = generator(func)
+            elif interval is None:
+                raise ValueError("The feed '{}' needs an interval, only async generator functions produce values "
+                                 "on their own.".format(name or func.__name__))
+            elif inspect.iscoroutinefunction(func):
+                produce = periodic(func, interval, lambda f: f())
+            else:
+                produce = periodic(func, interval, lambda f: self._callback_executor.run(f, None, (), {}))
+            self._feeds.add(Feed(name or func.__name__, output, produce, self._serializer.dumps))
+            if len(self._feeds.feeds) == 1:
+                self._inline_scripts.append(FEED_SCRIPT.replace("__TRANSPORT__", self._feed_transport))
+            return func
+
+        return wrap
+
+    async def serve_feeds(self):
+        """Stream the values of the feeds to a page, as server-sent events."""
+        names = quart.request.args.getlist("feed")
+        unknown = [name for name in names if name not in self._feeds.feeds]
+        if unknown:
+            return quart.Response("Unknown feed {!r}".format(unknown[0]), status=404)
+
+        async def events():
+            # Subscribe once the response is sent only, a client disconnecting earlier never iterates over the body.
+            subscription = self._feeds.subscribe(names)
+            try:
+                while True:
+                    try:
+                        messages = await asyncio.wait_for(subscription.get(), self._feed_heartbeat)
+                    except asyncio.TimeoutError:
+                        yield b": keep-alive\n\n"
+                        continue
+                    for message in messages:
+                        yield b"data: " + (message if isinstance(message, bytes) else message.encode("utf-8")) + \
+                            b"\n\n"
+                    self._feeds.sent += len(messages)
+            finally:
+                subscription.close()
+
+        response = quart.Response(events(), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        # Do not let proxies buffer the events.
+        response.headers["X-Accel-Buffering"] = "no"
+        response.timeout = None
+        return response
+
+    async def serve_feeds_websocket(self):
+        """Send the values of the feeds to a page, over a websocket."""
+        try:
+            subscription = self._feeds.subscribe(quart.websocket.args.getlist("feed"))
+        except KeyError:
+            await quart.websocket.close(1008)
+            return
+        try:
+            while True:
+                try:
+                    messages = await asyncio.wait_for(subscription.get(), self._feed_heartbeat)
+                except asyncio.TimeoutError:
+                    # Ping with an empty update, websocket control frames are not exposed.
+                    await quart.websocket.send('{"response":{}}')
+                    continue
+                for message in messages:
+                    await quart.websocket.send(message)
+                self._feeds.sent += len(messages)
+        finally:
+            subscription.close()
+
+    @property
+    def feed_stats(self):
+        """Number of feeds, running producers and subscriptions, and the number of values published by the producers,
+        sent to pages, and dropped because a page did not keep up."""
+        return self._feeds.stats
 
     async def serve_component_suites(self, package_name, fingerprinted_path):
         path_in_pkg, has_fingerprint = check_fingerprint(fingerprinted_path)
@@ -224,9 +643,18 @@ class Dash(original_dash):
             package.__path__,
         )
 
-        response = quart.Response(
-            pkgutil.get_data(package_name, path_in_pkg), mimetype=mimetype
-        )
+        # region ASYNC: Serve from an in-memory cache, loading (and compressing) off the event loop on first request
+
+        asset = await self._component_suites_cache.get(package_name, path_in_pkg, mimetype)
+        encoding, data, tag = asset.select(quart.request.headers.get("Accept-Encoding"))
+
+        response = quart.Response(data, mimetype=mimetype)
+        if asset.variants:
+            response.vary.add("Accept-Encoding")
+        if encoding is not None:
+            response.content_encoding = encoding
+
+        # endregion
 
         if has_fingerprint:
             # Fingerprinted resources are good forever (1 year)
@@ -235,8 +663,7 @@ class Dash(original_dash):
         else:
             # Non-fingerprinted resources are given an ETag that
             # will be used / check on future requests
-            await response.add_etag()
-            tag = response.get_etag()[0]
+            response.set_etag(tag)
 
             request_etag = quart.request.headers.get("If-None-Match")
 
@@ -246,30 +673,175 @@ class Dash(original_dash):
         return response
 
     async def dispatch(self):
-        body = await quart.request.get_json()
-        quart.g.inputs_list = inputs = body.get(  # pylint: disable=assigning-non-slot
+        data = await quart.request.get_data()
+        start = time.perf_counter()
+        body = self._serializer.loads(data)
+        parse_time = time.perf_counter() - start
+        # ASYNC: Clients accepting NDJSON receive the partial updates of async generator callbacks as they come
+        stream = "application/x-ndjson" in quart.request.headers.get("Accept", "")
+        return await self._dispatch_callback(body, stream, quart.request.headers.get("X-Dash-Session"), parse_time)
+
+    async def dispatch_batch(self):
+        """Dispatch several callback invocations posted as a JSON list in a single request.
+
+        Invocations targeting different outputs are executed concurrently, invocations targeting the same output are
+        executed in the order received. The response is a JSON list holding the status and body of each invocation.
+        """
+        data = await quart.request.get_data()
+        start = time.perf_counter()
+        bodies = self._serializer.loads(data)
+        parse_time = (time.perf_counter() - start) / max(len(bodies), 1)
+        chains = collections.defaultdict(list)
+        for i, body in enumerate(bodies):
+            chains[body["output"]].append(i)
+
+        responses = [None] * len(bodies)
+        session = quart.request.headers.get("X-Dash-Session")
+
+        async def run_chain(indices):
+            for i in indices:
+                responses[i] = await self._dispatch_item(bodies[i], session, parse_time)
+
+        await asyncio.gather(*[run_chain(indices) for indices in chains.values()])
+
+        response = quart.Response(
+            "[{}]".format(",".join(_item_json(status, data) for status, data, _ in responses)),
+            mimetype="application/json",
+        )
+        # Carry headers (e.g. cookies) set by the callbacks through callback_context.response.
+        for _, _, item_response in responses:
+            if item_response is None:
+                continue
+            for key, value in item_response.headers.items():
+                if key.lower() not in ("content-type", "content-length"):
+                    response.headers.add(key, value)
+        return response
+
+    async def dispatch_websocket(self):
+        """Dispatch callback invocations received over a websocket.
+
+        Each message holds an ``id`` and the ``body`` of a callback request. Invocations run concurrently, and each
+        result is sent back on the same socket as soon as it is available, tagged with the ``id`` of its request.
+        """
+        tasks = set()
+        # A websocket is held by a single page, which makes it a session of its own.
+        session = uuid.uuid4().hex
+
+        async def run(message, parse_time):
+            status, data, _ = await self._dispatch_item(message["body"], session, parse_time)
+            await quart.websocket.send(_item_json(status, data, '"id":{},'.format(json.dumps(message["id"]))))
+
+        try:
+            while True:
+                data = await quart.websocket.receive()
+                start = time.perf_counter()
+                message = self._serializer.loads(data)
+                task = asyncio.ensure_future(run(message, time.perf_counter() - start))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            # The client went away, nobody is waiting for the results anymore.
+            for task in tasks:
+                task.cancel()
+            self._output_differ.forget(session)
+
+    async def _dispatch_item(self, body, session=None, parse_time=None):
+        """Dispatch one of several invocations sent together, returning (status, data, response)."""
+        try:
+            item_response = await self._dispatch_callback(body, session=session, parse_time=parse_time)
+        except PreventUpdate:
+            return 204, None, None
+        except Exception as e:  # pylint: disable=broad-except
+            error_response = await self._error_response(e, body.get("output"))
+            # The error body is text (e.g. the traceback of the dev tools), sent as a JSON string.
+            error = json.dumps(await error_response.get_data(as_text=True))
+            return error_response.status_code, error, error_response
+        if item_response.status_code != 200:
+            return item_response.status_code, None, item_response
+        return item_response.status_code, await item_response.get_data(as_text=True), item_response
+
+    async def _error_response(self, error, output):
+        """Return the response ``dispatch`` makes when a callback raises ``error``: from the error handlers of the
+        server (e.g. the traceback of the dev tools), or a 500 Internal Server Error."""
+        try:
+            result = await self.server.handle_user_exception(error)
+        except Exception:  # pylint: disable=broad-except
+            self.logger.error("Exception on callback [%s]", output, exc_info=error)
+            result = await self.server.handle_user_exception(InternalServerError(original_exception=error))
+        response = await self.server.make_response(result)
+        if not isinstance(response, quart.Response):
+            # Unhandled HTTP errors make Werkzeug responses, whose body cannot be awaited.
+            response = quart.Response(response.get_data(), status=response.status_code, headers=response.headers)
+        return response
+
+    async def _dispatch_callback(self, body, stream=False, session=None, parse_time=None):
+        # ASYNC: The callback state lives in a context variable rather than on quart.g, isolating concurrent
+        # invocations within the same request.
+        g = CallbackGlobals()
+        token = callback_globals.set(g)
+        if self._metrics is not None:
+            g.phases = {} if parse_time is None else {"parse": parse_time}  # pylint: disable=assigning-non-slot
+        start = time.perf_counter()
+        outcome = "error"
+        response = None
+        try:
+            if self._profiler is None:
+                response = await self._invoke_callback(g, body, stream, session)
+            else:
+                with self._profiler.profile(body["output"]):
+                    response = await self._invoke_callback(g, body, stream, session)
+            outcome = {503: "rejected", 504: "timeout"}.get(response.status_code, "cached" if g.get("cached") else "ok")
+        except PreventUpdate:
+            outcome = "prevented"
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            callback_globals.reset(token)
+            if self._metrics is not None:
+                self._observe(body, g.phases, outcome, time.perf_counter() - start, response)
+        timing_information = g.get("timing_information")
+        if timing_information and quart.has_request_context():
+            quart.g.setdefault("timing_information", {}).update(timing_information)
+        return response
+
+    def _observe(self, body, phases, outcome, duration, response):
+        # The executor wait is included in the execution time measured by the callback wrapper.
+        if "execute" in phases and "executor_wait" in phases:
+            phases["execute"] = max(0.0, phases["execute"] - phases["executor_wait"])
+        size = response.content_length if outcome in ("ok", "cached") else None
+        # The output comes from the client, label the ones not naming a registered callback alike so that requests
+        # cannot add series at will.
+        output = body.get("output") if isinstance(body, dict) else None
+        callback_id = output if isinstance(output, str) and output in self.callback_map else "unknown"
+        self._metrics.observe(callback_id, outcome, duration, phases, size)
+
+    async def _invoke_callback(self, g, body, stream, session):
+        start = time.perf_counter()
+        g.inputs_list = inputs = body.get(  # pylint: disable=assigning-non-slot
             "inputs", []
         )
-        quart.g.states_list = state = body.get(  # pylint: disable=assigning-non-slot
+        g.states_list = state = body.get(  # pylint: disable=assigning-non-slot
             "state", []
         )
         output = body["output"]
         outputs_list = body.get("outputs") or split_callback_id(output)
-        quart.g.outputs_list = outputs_list  # pylint: disable=assigning-non-slot
+        g.outputs_list = outputs_list  # pylint: disable=assigning-non-slot
 
-        quart.g.input_values = (  # pylint: disable=assigning-non-slot
+        g.input_values = (  # pylint: disable=assigning-non-slot
             input_values
         ) = inputs_to_dict(inputs)
-        quart.g.state_values = inputs_to_dict(  # pylint: disable=assigning-non-slot
+        g.state_values = inputs_to_dict(  # pylint: disable=assigning-non-slot
             state
         )
         changed_props = body.get("changedPropIds", [])
-        quart.g.triggered_inputs = [  # pylint: disable=assigning-non-slot
+        g.triggered_inputs = [  # pylint: disable=assigning-non-slot
             {"prop_id": x, "value": input_values.get(x)} for x in changed_props
         ]
 
         response = (
-            quart.g.dash_response  # pylint: disable=assigning-non-slot
+            g.dash_response  # pylint: disable=assigning-non-slot
         ) = quart.Response("", mimetype="application/json")
 
         args = inputs_to_vals(inputs + state)
@@ -277,67 +849,285 @@ class Dash(original_dash):
         try:
             cb = self.callback_map[output]
             func = cb["callback"]
+            # ASYNC: Grouping flags and index mappers are precompiled at registration
+            plan = cb["plan"]
 
             # Add args_grouping
-            inputs_state_indices = cb["inputs_state_indices"]
-            inputs_state = inputs + state
-            args_grouping = map_grouping(
-                lambda ind: inputs_state[ind], inputs_state_indices
+            g.args_grouping = plan.args_grouping(  # pylint: disable=assigning-non-slot
+                inputs + state
             )
-            quart.g.args_grouping = args_grouping  # pylint: disable=assigning-non-slot
-            quart.g.using_args_grouping = (  # pylint: disable=assigning-non-slot
-                    not isinstance(inputs_state_indices, int)
-                    and (
-                            inputs_state_indices
-                            != list(range(grouping_len(inputs_state_indices)))
-                    )
+            g.using_args_grouping = (  # pylint: disable=assigning-non-slot
+                plan.using_args_grouping
             )
 
             # Add outputs_grouping
-            outputs_indices = cb["outputs_indices"]
-            if not isinstance(outputs_list, list):
-                flat_outputs = [outputs_list]
-            else:
-                flat_outputs = outputs_list
-
-            outputs_grouping = map_grouping(
-                lambda ind: flat_outputs[ind], outputs_indices
-            )
-            quart.g.outputs_grouping = (  # pylint: disable=assigning-non-slot
-                outputs_grouping
+            g.outputs_grouping = plan.outputs_grouping(  # pylint: disable=assigning-non-slot
+                outputs_list
             )
-            quart.g.using_outputs_grouping = (  # pylint: disable=assigning-non-slot
-                    not isinstance(outputs_indices, int)
-                    and outputs_indices != list(range(grouping_len(outputs_indices)))
+            g.using_outputs_grouping = (  # pylint: disable=assigning-non-slot
+                plan.using_outputs_grouping
             )
 
         except KeyError as missing_callback_function:
             msg = "Callback function not found for output '{}', perhaps you forgot to prepend the '@'?"
             raise KeyError(msg.format(output)) from missing_callback_function
-        if inspect.iscoroutinefunction(func):
-            output = await func(*args, outputs_list=outputs_list)
+
+        record_phase("prepare", start)
+        streamed = stream and plan.is_async_generator
+
+        # region ASYNC: Serve memoized responses and coalesce identical in-flight invocations
+
+        cache = self._get_callback_cache(plan)
+        coalesce = self._coalesce_callbacks if plan.coalesce is None else plan.coalesce
+        diff = self._diff_callback_outputs if plan.diff_outputs is None else plan.diff_outputs
+        if streamed:
+            # Partial updates are neither memoized nor shared.
+            cache, coalesce = None, False
+        key = invocation_key(output, body) if cache is not None or coalesce else None
+        if cache is not None:
+            cached = await cache.get(key)
+            if cached is not None:
+                g.cached = True  # pylint: disable=assigning-non-slot
+                response.set_data(self._diff_outputs(cached, diff, session))
+                return response
+
+        if streamed:
+            updates = asyncio.Queue()
+
+            async def execute():
+                with sampled_task():
+                    generator = await func(*args, outputs_list=outputs_list, serializer=self._serializer, stream=True)
+                    try:
+                        async for update in generator:
+                            updates.put_nowait(update)
+                    finally:
+                        # Closes the generator of the callback too when cancelled.
+                        await generator.aclose()
         else:
-            output = run_sync(func)(*args, outputs_list=outputs_list)
-        response.set_data(output)
+            async def execute():
+                with sampled_task():
+                    return await func(
+                        *args, outputs_list=outputs_list, executor=self._callback_executor,
+                        serializer=self._serializer, detector=self._blocking_detector, diff=diff
+                    )
+
+        async def compute():
+            # ASYNC: Wait for a slot to execute in, only invocations that actually execute the callback need one
+            result = await self._admission.run(
+                output, execute, priority=plan.priority, max_concurrency=plan.max_concurrency
+            )
+            if cache is not None:
+                await cache.set(key, result, plan.cache_timeout)
+            return result
+
+        # endregion
+
+        # region ASYNC: Cancel invocations that time out, are superseded or whose client disconnected
+
+        g.cancelled = threading.Event()  # pylint: disable=assigning-non-slot
+
+        async def run():
+            try:
+                if coalesce:
+                    return await self._single_flight.run(key, compute)
+                return await compute()
+            except asyncio.CancelledError:
+                # Let callbacks running in a thread know that they can stop.
+                g.cancelled.set()
+                raise
+
+        timeout = self._callback_timeout if plan.timeout is None else plan.timeout
+
+        async def invoke():
+            if timeout is None:
+                return await run()
+            return await asyncio.wait_for(run(), timeout)
+
+        async def supervise():
+            if session is not None and self._cancel_superseded_callbacks:
+                return await self._in_flight_callbacks.run(supersession_key(session, output, body), invoke)
+            return await invoke()
+
+        try:
+            if streamed:
+                # The admission slot, the timeout and the supersession cover the whole stream.
+                return await self._stream_response(g, response, supervise, updates, output, timeout)
+            output_json = await supervise()
+        except SupersededError:
+            # The client discards the response of a superseded invocation.
+            raise PreventUpdate from None
+        except asyncio.TimeoutError:
+            self.logger.warning("Callback [%s] timed out after %s seconds", output, timeout)
+            response.status_code = 504
+            return response
+        except OverloadedError:
+            self.logger.warning("Callback [%s] rejected, the admission queue is full", output)
+            response.status_code = 503
+            response.headers["Retry-After"] = str(self._overload_retry_after)
+            return response
+
+        # endregion
+
+        response.set_data(self._diff_outputs(output_json, diff, session))
+        return response
+
+    async def _stream_response(self, g, response, run, updates, output, timeout):
+        """Run a streamed invocation in a task of its own, which puts the partial updates in ``updates``. The response
+        is returned once the first update is available, failures up to then raise as for a regular invocation,
+        later ones end the stream."""
+        task = asyncio.ensure_future(run())
+        task.add_done_callback(lambda _: updates.put_nowait(None))
+        try:
+            first = await updates.get()
+        except BaseException:
+            task.cancel()
+            raise
+        if first is None:
+            task.result()
+            # The generator did not yield any update.
+            raise PreventUpdate
+
+        async def body():
+            try:
+                update = first
+                while update is not None:
+                    yield update
+                    update = await updates.get()
+                error = None if task.cancelled() else task.exception()
+                if isinstance(error, asyncio.TimeoutError):
+                    self.logger.warning("Callback [%s] timed out after %s seconds", output, timeout)
+                elif error is not None and not isinstance(error, SupersededError):
+                    self.logger.error("Exception on callback [%s]", output, exc_info=error)
+            finally:
+                # The client went away, stop the generator.
+                task.cancel()
+
+        response.response = IterableBody(_ndjson(g, body()))
+        response.mimetype = "application/x-ndjson"
+        del response.headers["Content-Length"]
         return response
 
+    def _diff_outputs(self, output_json, diff, session):
+        if diff and session is not None:
+            return self._output_differ.apply(session, output_json, self._serializer.loads)
+        if isinstance(output_json, SerializedProps):
+            # The page did not identify itself, send everything.
+            return str(output_json)
+        return output_json
+
+    @property
+    def coalescing_stats(self):
+        """Number of invocations that went through coalescing, how many of those were served by an invocation
+        already in flight, and how many invocations are in flight."""
+        return self._single_flight.stats
+
+    @property
+    def diffing_stats(self):
+        """Number of output props sent and left out as unchanged, the bytes left out and the number of pages
+        remembered."""
+        return self._output_differ.stats
+
+    @property
+    def admission_stats(self):
+        """Number of invocations admitted and rejected, executing and waiting to execute, and the total and maximum
+        time (in seconds) invocations waited to be admitted."""
+        return self._admission.stats
+
+    def _get_callback_cache(self, plan):
+        if plan.cache is None or plan.cache is False:
+            return None
+        if plan.cache is not True:
+            return plan.cache
+        if self._callback_cache is None:
+            self._callback_cache = MemoryCallbackCache()
+        return self._callback_cache
+
     def run_server(self, *args, **kwargs):
         loop = asyncio.get_event_loop()
         loop.set_exception_handler(exception_handler)
         return super().run_server(*args, **kwargs, loop=loop)
 
+    # region ASYNC: Serve the layout and the dependencies from cached JSON, and support coroutine layout functions
+
+    @property
+    def layout(self):
+        return self._layout
+
+    @layout.setter
+    def layout(self, value):
+        self._layout_json = None
+        self._layout_is_coroutine = inspect.iscoroutinefunction(value)
+        if not self._layout_is_coroutine:
+            original_dash.layout.fset(self, value)
+            return
+        # The validation layout of Dash is built by calling the layout function, which cannot be done without
+        # awaiting it. Like for a static layout, callbacks are validated against the layout served.
+        _validate.validate_layout_type(value)
+        self._layout_is_function = True
+        self._layout = value
+
+    def _layout_value(self):
+        if self._layout_is_coroutine:
+            # Only reached from _setup_server, which awaits the layout beforehand.
+            return self._with_extra_components(self._awaited_layout)
+        return super()._layout_value()
+
+    async def _async_layout_value(self):
+        if self._layout_is_coroutine:
+            return self._with_extra_components(await self._layout())
+        return self._layout_value()
+
+    def _with_extra_components(self, layout):
+        if self._extra_components:
+            layout = html.Div(children=[layout] + self._extra_components)
+        return layout
+
+    async def _setup_server(self):
+        if isinstance(self._long_callback_manager, AsyncioLongCallbackManager):
+            # ASYNC: Run the coroutine jobs of long callbacks on the server loop
+            self._long_callback_manager.bind(asyncio.get_running_loop())
+        if self._layout_is_coroutine:
+            self._awaited_layout = await self._layout()
+        try:
+            super()._setup_server()
+        finally:
+            self._awaited_layout = None
+        # The extra components may have changed.
+        self._layout_json = None
+
     async def serve_layout(self):
-        return super().serve_layout()
+        if self._layout_is_function:
+            # Layout functions are evaluated per request, their result is not cached.
+            data = self._serializer.dumps(await self._async_layout_value())
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            return _conditional_json(data, hashlib.md5(data).hexdigest())
+        if self._layout_json is None:
+            data = self._serializer.dumps(self._layout_value())
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            self._layout_json = data, hashlib.md5(data).hexdigest()
+        return _conditional_json(*self._layout_json)
+
+    async def dependencies(self):
+        # Callbacks are only ever added, the length of the list tells whether the cached JSON is still valid.
+        if self._dependencies_json is None or self._dependencies_json[0] != len(self._callback_list):
+            data = json.dumps(self._callback_list, separators=(",", ":")).encode("utf-8")
+            self._dependencies_json = len(self._callback_list), data, hashlib.md5(data).hexdigest()
+        return _conditional_json(*self._dependencies_json[1:])
+
+    # endregion
 
     async def serve_reload_hash(self):
         return super().serve_reload_hash()
 
     async def index(self, *args, **kwargs):
+        if SESSION_SCRIPT not in self._inline_scripts and any(
+                cb["plan"].diff_outputs for cb in self.callback_map.values() if "plan" in cb):
+            # ASYNC: Callbacks opting in to diffing are registered after __init__, identify the pages once known
+            self._inline_scripts.append(SESSION_SCRIPT)
         return super().index(*args, **kwargs)
 
-    async def dependencies(self):
-        return super().dependencies()
-
     async def _serve_default_favicon(self):
         return super()._serve_default_favicon()
 
@@ -0,0 +1,139 @@
+import asyncio
+import collections
+import contextlib
+import sys
+import threading
+import time
+
+from async_dash.monkey_patch_callback_context import callback_globals
+
+
+class _Profile:
+    __slots__ = ("callback_id", "loop_thread", "task", "thread", "samples")
+
+    def __init__(self, callback_id, loop_thread, task):
+        self.callback_id = callback_id
+        self.loop_thread = loop_thread
+        self.task = task
+        # Set while a synchronous callback runs in a worker thread.
+        self.thread = None
+        self.samples = collections.Counter()
+
+
+class SlowCallbackProfiler:
+    """Sampling profiler recording where slow callbacks spend their time.
+
+    While invocations are running, a background thread samples their stacks every ``interval`` seconds: the stack
+    of the worker thread for synchronous callbacks, the stack of the event loop thread while the task executing them
+    is running for coroutines. Invocations taking at least ``threshold`` seconds are recorded, with their samples
+    aggregated by (collapsed) stack. Callbacks executed in a process are not sampled.
+
+    :param threshold: Minimum duration (in seconds) of the invocations that are recorded.
+    :param interval: Number of seconds between samples.
+    :param max_records: Number of records kept, the oldest are dropped first.
+    """
+
+    def __init__(self, threshold=1.0, interval=0.005, max_records=100):
+        self.threshold = threshold
+        self.interval = interval
+        self.records = collections.deque(maxlen=max_records)
+        self._active = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @contextlib.contextmanager
+    def profile(self, callback_id):
+        """Sample the stacks of the invocation running in the block, recording it if it turns out to be slow."""
+        profile = _Profile(callback_id, threading.get_ident(), asyncio.current_task())
+        g = callback_globals.get()
+        if g is not None:
+            g.profile = profile  # pylint: disable=assigning-non-slot
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, name="async-dash-profiler", daemon=True)
+                self._thread.start()
+        start = time.perf_counter()
+        try:
+            yield profile
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self._active.discard(profile)
+            if duration >= self.threshold:
+                self.records.append({
+                    "callback": callback_id,
+                    "duration": duration,
+                    "time": time.time(),
+                    "samples": profile.samples.most_common(),
+                })
+
+    def _sample(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = list(self._active)
+            frames = sys._current_frames()  # pylint: disable=protected-access
+            for profile in active:
+                if profile.thread is not None:
+                    frame = frames.get(profile.thread)
+                elif profile.task is not None and _current_task(profile.task) is profile.task:
+                    frame = frames.get(profile.loop_thread)
+                else:
+                    continue
+                if frame is not None:
+                    profile.samples[_collapse(frame)] += 1
+
+
+@contextlib.contextmanager
+def sampled_task():
+    """Mark the current task as the one executing the running callback invocation, if it is profiled.
+
+    The invocation may execute in a task other than the one handling the request (e.g. when it is coalesced, times
+    out or can be superseded), which is only sampled until the callback starts executing.
+    """
+    g = callback_globals.get()
+    profile = None if g is None else g.get("profile")
+    if profile is None:
+        yield
+        return
+    task, profile.task = profile.task, asyncio.current_task()
+    try:
+        yield
+    finally:
+        profile.task = task
+
+
+@contextlib.contextmanager
+def sampled_thread():
+    """Mark the current (worker) thread as the one executing the running callback invocation, if it is profiled."""
+    g = callback_globals.get()
+    profile = None if g is None else g.get("profile")
+    if profile is None:
+        yield
+        return
+    profile.thread = threading.get_ident()
+    try:
+        yield
+    finally:
+        profile.thread = None
+
+
+def _current_task(task):
+    try:
+        return asyncio.current_task(task.get_loop())
+    except RuntimeError:
+        return None
+
+
+def _collapse(frame):
+    """Collapse a stack into a single line, outermost frame first, as consumed by flame graph tools."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append("{}:{}:{}".format(code.co_filename, code.co_name, frame.f_lineno))
+        frame = frame.f_back
+    return ";".join(reversed(names))
@@ -0,0 +1,76 @@
+import json
+
+from dash._utils import to_json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy is optional
+    numpy = None
+
+try:
+    import pandas
+except ImportError:  # pragma: no cover - pandas is optional
+    pandas = None
+
+
+class Serializer:
+    """Parses callback request bodies and serializes callback responses."""
+
+    def loads(self, data):
+        """Parse a request body (bytes)."""
+        return json.loads(data)
+
+    def dumps(self, obj):
+        """Serialize a response, returning str or bytes. Raises TypeError for objects that cannot be serialized."""
+        return to_json(obj)
+
+
+class PlotlySerializer(Serializer):
+    """The Dash default, ``json`` for requests and plotly's ``to_json`` for responses."""
+
+
+class OrjsonSerializer(Serializer):
+    """Serializer backed by orjson. NumPy arrays (and pandas objects backed by them) are encoded directly from their
+    buffers rather than being converted to lists first. Responses holding types orjson cannot encode fall back to
+    plotly's ``to_json``.
+    """
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonSerializer requires orjson, install it with 'pip install orjson'.")
+        self.option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj):
+        try:
+            return orjson.dumps(obj, default=_default, option=self.option)
+        except TypeError:
+            return to_json(obj)
+
+
+def _default(obj):
+    # Dash components and plotly figures.
+    to_plotly_json = getattr(obj, "to_plotly_json", None)
+    if to_plotly_json is not None:
+        return to_plotly_json()
+    if numpy is not None:
+        if isinstance(obj, numpy.ndarray):
+            # orjson only passes arrays it cannot encode, i.e. non-contiguous ones or unsupported dtypes.
+            return numpy.ascontiguousarray(obj) if not obj.flags.c_contiguous else obj.tolist()
+        if isinstance(obj, numpy.generic):
+            return obj.item()
+    if pandas is not None:
+        if isinstance(obj, (pandas.Series, pandas.Index)):
+            return obj.to_numpy()
+        if isinstance(obj, pandas.Timestamp):
+            return obj.isoformat()
+        if obj is pandas.NaT:
+            return None
+    raise TypeError
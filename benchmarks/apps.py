@@ -0,0 +1,99 @@
+"""The app served by ``benchmarks.bench_dispatch``, built for either async-dash or stock (Flask) Dash.
+
+The callbacks cover the dispatch scenarios of the benchmark; coroutine callbacks are only registered for async-dash.
+"""
+import asyncio
+import time
+
+MULTI_OUTPUTS = 100
+PATTERN_ITEMS = 1000
+LAYOUT_ITEMS = 2000
+
+
+def build_app(dash_class, io_delay=0.05, asynchronous=True):
+    from dash import ALL, Input, Output, html, dcc
+
+    app = dash_class(__name__)
+    app.layout = html.Div([
+        dcc.Input(id="in"),
+        html.Div(id="sync-out"),
+        html.Div(id="io-sync-out"),
+        html.Div([html.Div(id="multi-{}".format(i)) for i in range(MULTI_OUTPUTS)]),
+        html.Div([dcc.Input(id={"type": "pm-in", "index": i}, value=i) for i in range(PATTERN_ITEMS)]),
+        html.Div([html.Div(id={"type": "pm-out", "index": i}) for i in range(PATTERN_ITEMS)]),
+        html.Div([html.P("Paragraph {}".format(i), className="p", title=str(i)) for i in range(LAYOUT_ITEMS)]),
+    ] + ([html.Div(id="async-out"), html.Div(id="io-async-out")] if asynchronous else []))
+
+    @app.callback(Output("sync-out", "children"), Input("in", "value"))
+    def sync_callback(value):
+        return sum(range(100)) + (value or 0)
+
+    @app.callback(Output("io-sync-out", "children"), Input("in", "value"))
+    def io_sync_callback(value):
+        time.sleep(io_delay)
+        return value
+
+    @app.callback([Output("multi-{}".format(i), "children") for i in range(MULTI_OUTPUTS)], Input("in", "value"))
+    def multi_output_callback(value):
+        return [value] * MULTI_OUTPUTS
+
+    @app.callback(Output({"type": "pm-out", "index": ALL}, "children"),
+                  Input({"type": "pm-in", "index": ALL}, "value"))
+    def pattern_matching_callback(values):
+        return [str(v) for v in values]
+
+    if asynchronous:
+        @app.callback(Output("async-out", "children"), Input("in", "value"))
+        async def async_callback(value):
+            return sum(range(100)) + (value or 0)
+
+        @app.callback(Output("io-async-out", "children"), Input("in", "value"))
+        async def io_async_callback(value):
+            await asyncio.sleep(io_delay)
+            return value
+
+    return app
+
+
+def _single(output_id):
+    def body(value):
+        return {
+            "output": "{}.children".format(output_id),
+            "outputs": {"id": output_id, "property": "children"},
+            "inputs": [{"id": "in", "property": "value", "value": value}],
+            "changedPropIds": ["in.value"],
+        }
+
+    return body
+
+
+def _multi_output(value):
+    outputs = [{"id": "multi-{}".format(i), "property": "children"} for i in range(MULTI_OUTPUTS)]
+    return {
+        "output": "..{}..".format("...".join("multi-{}.children".format(i) for i in range(MULTI_OUTPUTS))),
+        "outputs": outputs,
+        "inputs": [{"id": "in", "property": "value", "value": value}],
+        "changedPropIds": ["in.value"],
+    }
+
+
+def _pattern_matching(value):
+    return {
+        "output": '{"index":["ALL"],"type":"pm-out"}.children',
+        "outputs": [{"id": {"type": "pm-out", "index": i}, "property": "children"} for i in range(PATTERN_ITEMS)],
+        "inputs": [[{"id": {"type": "pm-in", "index": i}, "property": "value", "value": i + value}
+                    for i in range(PATTERN_ITEMS)]],
+        "changedPropIds": ['{"index":0,"type":"pm-in"}.value'],
+    }
+
+
+# Callback request bodies per dispatch scenario, as a function of a counter (so that responses are not identical).
+DISPATCH_BODIES = {
+    "sync": _single("sync-out"),
+    "async": _single("async-out"),
+    "io-sync": _single("io-sync-out"),
+    "io-async": _single("io-async-out"),
+    "multi-output": _multi_output,
+    "pattern-matching": _pattern_matching,
+}
+ASYNC_SCENARIOS = ("async", "io-async")
@@ -0,0 +1,308 @@
+"""Load test of the callback dispatch path, component suite serving and layout serving.
+
+Every scenario is run by ``concurrency`` clients issuing ``requests`` requests in total, reporting the throughput
+and the latency percentiles. Transports:
+
+- ``test-client``: async-dash in process, through Quart's test client (no network, measures the framework only).
+- ``hypercorn``: async-dash served by a local Hypercorn process.
+- ``flask``: stock Dash served by the (threaded) Flask development server in a local process, as a baseline.
+
+Results are written as JSON (to stdout, or ``--output``), so that runs can be compared across commits. Throughput
+and latencies only count successful requests, scenarios with errors are marked ``failed``.
+
+    python -m benchmarks.bench_dispatch --transport test-client hypercorn flask --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.apps import ASYNC_SCENARIOS, DISPATCH_BODIES, build_app
+
+SCENARIOS = tuple(DISPATCH_BODIES) + ("component-suites", "layout")
+TRANSPORTS = ("test-client", "hypercorn", "flask")
+
+
+# region Clients
+
+
+class TestClient:
+    """Client calling the app in process."""
+
+    def __init__(self, app):
+        self._client = app.server.test_client()
+
+    async def request(self, method, path, body=None):
+        response = await self._client.open(path, method=method, data=body, headers={
+            "Content-Type": "application/json"})
+        return response.status_code, await response.get_data()
+
+    async def close(self):
+        pass
+
+
+class HttpClient:
+    """Minimal HTTP/1.1 client over a single keep-alive connection, to avoid depending on a client library."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, body=None):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = body or b""
+        head = "{} {} HTTP/1.1\r\nHost: {}:{}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n".format(
+            method, path, self.host, self.port, len(body))
+        self._writer.write(head.encode("latin-1") + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by the server")
+        version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+        headers = {}
+        while True:
+            line = (await self._reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            data = await self._reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            data = b""
+            while True:
+                size = int((await self._reader.readline()).strip(), 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                data += chunk[:-2]
+        else:
+            data = await self._reader.read()
+        if version == "HTTP/1.0" or headers.get("connection", "").lower() == "close":
+            await self.close()
+        return int(status), data
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+# endregion
+
+# region Load generation
+
+
+async def run_scenario(make_client, method, path, make_body, concurrency, requests):
+    latencies, errors, counter = [], 0, iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        client = make_client()
+        try:
+            for i in counter:
+                body = None if make_body is None else json.dumps(make_body(i)).encode("utf-8")
+                start = time.perf_counter()
+                try:
+                    status, _ = await client.request(method, path, body)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    status = None
+                    await client.close()
+                # Failed requests (often much faster than real ones) are left out of the throughput and latencies.
+                if status in (200, 204, 304):
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "failed": errors > 0,
+        "throughput": len(latencies) / elapsed,
+        "latency_ms": {
+            "mean": statistics.mean(latencies) * 1e3,
+            "p50": _percentile(latencies, 0.5) * 1e3,
+            "p99": _percentile(latencies, 0.99) * 1e3,
+            "max": latencies[-1] * 1e3,
+        } if latencies else None,
+    }
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def component_suite_path(client):
+    _, index = await client.request("GET", "/")
+    return re.search(r'src="(/_dash-component-suites/dash/dash-renderer/[^"]+)"', index.decode("utf-8")).group(1)
+
+
+async def run_transport(transport, make_client, scenarios, args):
+    results = []
+    probe = make_client()
+    suite_path = await component_suite_path(probe)
+    await probe.close()
+    for scenario in scenarios:
+        if transport == "flask" and scenario in ASYNC_SCENARIOS:
+            continue
+        if scenario == "component-suites":
+            method, path, make_body = "GET", suite_path, None
+        elif scenario == "layout":
+            method, path, make_body = "GET", "/_dash-layout", None
+        else:
+            method, path, make_body = "POST", "/_dash-update-component", DISPATCH_BODIES[scenario]
+        requests = args.requests if not scenario.startswith("io-") else args.io_requests
+        # Warm up (caches, imports, thread pools) before measuring.
+        await run_scenario(make_client, method, path, make_body, args.concurrency, min(requests, 50))
+        result = await run_scenario(make_client, method, path, make_body, args.concurrency, requests)
+        result.update(transport=transport, scenario=scenario)
+        latency = result["latency_ms"] or {"p50": float("nan"), "p99": float("nan")}
+        print("{:<12} {:<17} {:>10.1f} req/s  p50 {:>8.2f} ms  p99 {:>8.2f} ms  errors {}{}".format(
+            transport, scenario, result["throughput"], latency["p50"], latency["p99"], result["errors"],
+            "  FAILED" if result["failed"] else ""), file=sys.stderr)
+        results.append(result)
+    return results
+
+
+# endregion
+
+# region Servers
+
+
+def serve(kind, port, io_delay):
+    """Serve the benchmark app (run in a child process)."""
+    if kind == "flask":
+        import logging
+        import dash
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        app = build_app(dash.Dash, io_delay, asynchronous=False)
+        app.run_server(host="127.0.0.1", port=port, threaded=True)
+    else:
+        from hypercorn.asyncio import serve as hypercorn_serve
+        from hypercorn.config import Config
+        from async_dash import Dash
+
+        app = build_app(Dash, io_delay)
+        # Hypercorn creates its sockets with proto 0, for which asyncio does not disable Nagle's algorithm. A
+        # response written in two parts (headers, then body) on a kept-alive connection then waits for the delayed
+        # ACK of the client, ~40 ms. Hand Hypercorn a TCP socket so that connections get TCP_NODELAY.
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", port))
+        config = Config()
+        config.bind = ["fd://{}".format(sock.fileno())]
+        config.loglevel = "ERROR"
+        asyncio.run(hypercorn_serve(app.server, config))
+
+
+def start_server(kind, io_delay):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_dispatch", "--serve", kind, "--port", str(port),
+         "--io-delay", str(io_delay)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, port
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("The {} server exited with code {}".format(kind, process.returncode))
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("The {} server did not start".format(kind))
+
+
+# endregion
+
+
+def metadata(args):
+    from importlib.metadata import version
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "dash": version("dash"),
+        "quart": version("quart"),
+        "args": {k: v for k, v in vars(args).items() if k not in ("serve", "port", "output")},
+    }
+
+
+async def run(args):
+    results = []
+    for transport in args.transport:
+        if transport == "test-client":
+            from async_dash import Dash
+
+            app = build_app(Dash, args.io_delay)
+            results += await run_transport(transport, lambda: TestClient(app), args.scenario, args)
+            continue
+        process, port = start_server("flask" if transport == "flask" else "async", args.io_delay)
+        try:
+            results += await run_transport(transport, lambda: HttpClient("127.0.0.1", port), args.scenario, args)
+        finally:
+            process.terminate()
+            process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--transport", nargs="+", choices=TRANSPORTS, default=["test-client"])
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--io-requests", type=int, default=500, help="Number of requests of the I/O scenarios.")
+    parser.add_argument("--io-delay", type=float, default=0.05, help="Seconds the I/O callbacks wait.")
+    parser.add_argument("--output", help="File the JSON results are written to, default stdout.")
+    parser.add_argument("--serve", choices=("async", "flask"), help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.io_delay)
+        return
+
+    report = {"meta": metadata(args), "results": asyncio.run(run(args))}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
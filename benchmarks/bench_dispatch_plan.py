@@ -0,0 +1,82 @@
+"""Micro-benchmark of the per-call grouping work done by ``Dash.dispatch``.
+
+Compares the legacy computation (rebuilding ``list(range(grouping_len(...)))`` and mapping the groupings on every
+request) with looking the values up in the precompiled ``DispatchPlan``.
+
+    python -m benchmarks.bench_dispatch_plan
+"""
+import inspect
+import timeit
+
+import async_dash  # noqa: F401 - applies the patches
+from dash import Input, Output, State
+from dash._grouping import map_grouping, grouping_len
+
+from async_dash.dispatch_plan import DispatchPlan
+
+
+def legacy(cb, func, inputs_state, outputs_list):
+    inputs_state_indices = cb["inputs_state_indices"]
+    args_grouping = map_grouping(lambda ind: inputs_state[ind], inputs_state_indices)
+    using_args_grouping = not isinstance(inputs_state_indices, int) and (
+        inputs_state_indices != list(range(grouping_len(inputs_state_indices)))
+    )
+    outputs_indices = cb["outputs_indices"]
+    flat_outputs = [outputs_list] if not isinstance(outputs_list, list) else outputs_list
+    outputs_grouping = map_grouping(lambda ind: flat_outputs[ind], outputs_indices)
+    using_outputs_grouping = not isinstance(outputs_indices, int) and outputs_indices != list(
+        range(grouping_len(outputs_indices))
+    )
+    return args_grouping, using_args_grouping, outputs_grouping, using_outputs_grouping, inspect.iscoroutinefunction(
+        func)
+
+
+def planned(cb, func, inputs_state, outputs_list):
+    plan = cb["plan"]
+    return plan.args_grouping(inputs_state), plan.using_args_grouping, plan.outputs_grouping(outputs_list), \
+        plan.using_outputs_grouping, plan.is_coroutine
+
+
+def make_case(name, outputs, inputs, multi):
+    from dash.dependencies import handle_grouped_callback_args
+    from dash._grouping import flatten_grouping, make_grouping_by_index
+
+    output, flat_inputs, flat_state, inputs_state_indices, _ = handle_grouped_callback_args(
+        (), dict(output=outputs, inputs=inputs))
+    outputs_indices = make_grouping_by_index(output, list(range(grouping_len(output))))
+    insert_output = flatten_grouping(output) if multi else output
+    plan = DispatchPlan(name, output, insert_output, multi, outputs_indices, inputs_state_indices)
+
+    async def func(*_):
+        pass
+
+    plan.bind(func)
+    cb = dict(inputs_state_indices=inputs_state_indices, outputs_indices=outputs_indices, plan=plan)
+    inputs_state = [{"id": d.component_id, "property": d.component_property, "value": 1}
+                    for d in flat_inputs + flat_state]
+    flat_outputs = [{"id": d.component_id, "property": d.component_property} for d in flatten_grouping(output)]
+    outputs_list = flat_outputs if multi else flat_outputs[0]
+    assert legacy(cb, func, inputs_state, outputs_list) == planned(cb, func, inputs_state, outputs_list)
+    return cb, func, inputs_state, outputs_list
+
+
+CASES = {
+    "single": (Output("o", "children"), [Input("i", "value")], False),
+    "flat-10": ([Output("o{}".format(i), "children") for i in range(10)],
+                [Input("i{}".format(i), "value") for i in range(10)] + [State("s", "data")], True),
+    "grouped": (dict(a=Output("a", "children"), b=[Output("b", "children"), Output("c", "children")]),
+                dict(x=Input("x", "value"), y=dict(z=State("z", "value"), w=Input("w", "value"))), True),
+}
+
+
+def main(number=100000):
+    print("{:<10} {:>14} {:>14} {:>8}".format("case", "legacy (us)", "plan (us)", "speedup"))
+    for name, (outputs, inputs, multi) in CASES.items():
+        case = make_case(name, outputs, inputs, multi)
+        t_legacy = min(timeit.repeat(lambda: legacy(*case), number=number, repeat=3)) / number * 1e6
+        t_plan = min(timeit.repeat(lambda: planned(*case), number=number, repeat=3)) / number * 1e6
+        print("{:<10} {:>14.3f} {:>14.3f} {:>7.1f}x".format(name, t_legacy, t_plan, t_legacy / t_plan))
+
+
+if __name__ == "__main__":
+    main()
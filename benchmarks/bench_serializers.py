@@ -0,0 +1,61 @@
+"""Throughput of callback response serialization for large figures.
+
+Compares the default ``PlotlySerializer`` (plotly's ``to_json``, using its pure ``json`` engine as well as the
+``orjson`` engine it picks when orjson is installed) with ``OrjsonSerializer`` on the response of a callback
+returning a figure with ``n`` points per trace.
+
+    python -m benchmarks.bench_serializers
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.io.json
+
+from dash._utils import to_json
+
+from async_dash.serializers import OrjsonSerializer, PlotlySerializer
+
+
+def make_response(n, traces=4):
+    x = pd.Series(np.arange(n, dtype=np.float64))
+    figure = {
+        "data": [{"type": "scattergl", "x": x, "y": np.random.standard_normal(n).cumsum()} for _ in range(traces)],
+        "layout": {"title": {"text": "{} points".format(n)}},
+    }
+    return {"response": {"graph": {"figure": figure}}, "multi": True}
+
+
+class PlotlyJsonEngineSerializer(PlotlySerializer):
+    def dumps(self, obj):
+        engine = plotly.io.json.config.default_engine
+        plotly.io.json.config.default_engine = "json"
+        try:
+            return to_json(obj)
+        finally:
+            plotly.io.json.config.default_engine = engine
+
+
+def measure(serializer, response, min_time=1.0):
+    count, size, start = 0, 0, time.perf_counter()
+    while True:
+        size = len(serializer.dumps(response))
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed > min_time:
+            return count / elapsed, size
+
+
+def main():
+    serializers = {"plotly-json": PlotlyJsonEngineSerializer(), "plotly": PlotlySerializer(),
+                   "orjson": OrjsonSerializer()}
+    print("{:>9} {:>12} {:>12} {:>10} {:>9}".format("points", "engine", "calls/s", "MB/s", "MB"))
+    for n in (10_000, 100_000, 1_000_000):
+        response = make_response(n)
+        for name, serializer in serializers.items():
+            rate, size = measure(serializer, response)
+            print("{:>9} {:>12} {:>12.1f} {:>10.1f} {:>9.2f}".format(n, name, rate, rate * size / 1e6, size / 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Micro-benchmark of the response assembly of a callback with a pattern-matching (``ALL``) output.
+
+Compares the legacy path (``validate_output_spec`` building an ``Output`` per requested id, then ``stringify_id`` for
+each of them) with the ``WildcardOutput`` of the ``DispatchPlan``, which validates the ids against the pattern and
+stringifies them in a single pass, remembering the stringified ids across requests. The serialization of the
+response (``to_json``), which both paths share, is shown for scale.
+
+    python -m benchmarks.bench_wildcard_outputs
+"""
+import collections
+import timeit
+
+import async_dash  # noqa: F401 - applies the patches
+from dash import ALL, Output
+from dash import _validate
+from dash._utils import stringify_id, to_json
+
+from async_dash.dispatch_plan import DispatchPlan
+
+SIZES = (1000, 10000, 100000)
+
+
+def legacy(plan, output_spec, values):
+    _validate.validate_output_spec(plan.insert_output, output_spec, Output)
+    component_ids = collections.defaultdict(dict)
+    for vali, speci in zip(values, output_spec):
+        component_ids[stringify_id(speci["id"])][speci["property"]] = vali
+    return component_ids
+
+
+def planned(plan, output_spec, values):
+    resolved = plan.validate_output_spec(output_spec)
+    component_ids = collections.defaultdict(dict)
+    plan.wildcard_outputs[0].collect(values, resolved[0], component_ids)
+    return component_ids
+
+
+def make_case(size):
+    output = Output({"type": "cell", "index": ALL}, "children")
+    plan = DispatchPlan("bench", output, output, False, 0, [0])
+    plan.bind(lambda values: values)
+    output_spec = [{"id": {"type": "cell", "index": i}, "property": "children"} for i in range(size)]
+    values = ["value {}".format(i) for i in range(size)]
+    assert legacy(plan, output_spec, values) == planned(plan, output_spec, values)
+    return plan, output_spec, values
+
+
+def main(number=10):
+    print("{:<8} {:>14} {:>14} {:>8} {:>14}".format("ids", "legacy (ms)", "plan (ms)", "speedup", "to_json (ms)"))
+    for size in SIZES:
+        case = make_case(size)
+        repeat = max(1, number * 1000 // size)
+        t_legacy = min(timeit.repeat(lambda: legacy(*case), number=repeat, repeat=3)) / repeat * 1e3
+        t_plan = min(timeit.repeat(lambda: planned(*case), number=repeat, repeat=3)) / repeat * 1e3
+        response = {"response": planned(*case), "multi": True}
+        t_json = min(timeit.repeat(lambda: to_json(response), number=repeat, repeat=3)) / repeat * 1e3
+        print("{:<8} {:>14.3f} {:>14.3f} {:>7.1f}x {:>14.3f}".format(
+            size, t_legacy, t_plan, t_legacy / t_plan, t_json))
+
+
+if __name__ == "__main__":
+    main()
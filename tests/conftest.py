@@ -0,0 +1,43 @@
+import asyncio
+import inspect
+import json
+
+import pytest
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run the coroutine tests in a fresh event loop, the Quart test client being asynchronous."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    funcargs = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    asyncio.run(pyfuncitem.obj(**funcargs))
+    return True
+
+
+def invocation(output_id, value, prop="children", input_id="i"):
+    """Body of a request invoking the callback of ``output_id.prop`` with ``value`` as its single input."""
+    return {
+        "output": "{}.{}".format(output_id, prop),
+        "outputs": {"id": output_id, "property": prop},
+        "inputs": [{"id": input_id, "property": "value", "value": value}],
+        "changedPropIds": ["{}.value".format(input_id)],
+    }
+
+
+async def post(client, body, session=None, **headers):
+    """Invoke a callback, returning the status code and the decoded body of the response (``None`` if empty)."""
+    if session is not None:
+        headers["X-Dash-Session"] = session
+    response = await client.post("/_dash-update-component", json=body, headers=headers)
+    data = await response.get_data(as_text=True)
+    return response.status_code, json.loads(data) if data else None
+
+
+async def until(predicate, timeout=2.0):
+    """Wait until ``predicate()`` is true."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Timed out waiting for the condition")
+        await asyncio.sleep(0.005)
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from dash import Input, Output, html
+
+from async_dash import Dash
+from async_dash.admission import AdmissionController, OverloadedError
+
+from conftest import invocation, post, until
+
+
+async def test_priority_orders_the_queue():
+    admission = AdmissionController(max_concurrency=1)
+    release = asyncio.Event()
+    order = []
+
+    async def hold():
+        await release.wait()
+
+    def record(name):
+        async def func():
+            order.append(name)
+        return func
+
+    holder = asyncio.ensure_future(admission.run("a", hold))
+    await until(lambda: admission.running == 1)
+    waiters = [asyncio.ensure_future(admission.run("b", record("low"), priority="low"))]
+    await until(lambda: admission.queued == 1)
+    waiters.append(asyncio.ensure_future(admission.run("c", record("normal"))))
+    waiters.append(asyncio.ensure_future(admission.run("d", record("high"), priority="high")))
+    await until(lambda: admission.queued == 3)
+    release.set()
+    await asyncio.gather(holder, *waiters)
+    assert order == ["high", "normal", "low"]
+    assert admission.stats["admitted"] == 4
+
+
+async def test_per_callback_limit_does_not_block_others():
+    admission = AdmissionController()
+    release = asyncio.Event()
+
+    async def hold():
+        await release.wait()
+
+    async def other():
+        return "other"
+
+    holder = asyncio.ensure_future(admission.run("a", hold, max_concurrency=1))
+    await until(lambda: admission.running == 1)
+    queued = asyncio.ensure_future(admission.run("a", other, max_concurrency=1))
+    await until(lambda: admission.queued == 1)
+    assert await admission.run("b", other, max_concurrency=1) == "other"
+    release.set()
+    assert await queued == "other"
+    await holder
+
+
+async def test_full_queue_rejects():
+    admission = AdmissionController(max_concurrency=1, max_queue=0)
+    release = asyncio.Event()
+
+    async def hold():
+        await release.wait()
+
+    holder = asyncio.ensure_future(admission.run("a", hold))
+    await until(lambda: admission.running == 1)
+    with pytest.raises(OverloadedError):
+        await admission.run("a", hold)
+    release.set()
+    await holder
+    assert admission.stats["rejected"] == 1
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    admission = AdmissionController(max_concurrency=1)
+    release = asyncio.Event()
+
+    async def hold():
+        await release.wait()
+
+    holder = asyncio.ensure_future(admission.run("a", hold))
+    await until(lambda: admission.running == 1)
+    waiter = asyncio.ensure_future(admission.run("a", hold))
+    await until(lambda: admission.queued == 1)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    release.set()
+    await holder
+    assert admission.stats["queued"] == 0
+    assert admission.stats["running"] == 0
+
+
+async def test_overloaded_app_answers_503():
+    app = Dash(__name__, max_concurrent_callbacks=1, max_queued_callbacks=0, overload_retry_after=3)
+    app.layout = html.Div()
+    release = asyncio.Event()
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    async def slow(value):
+        await release.wait()
+        return value
+
+    client = app.server.test_client()
+    first = asyncio.ensure_future(post(client, invocation("o", 1)))
+    await until(lambda: app.admission_stats["running"] == 1)
+    response = await client.post("/_dash-update-component", json=invocation("o", 2))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    release.set()
+    assert await first == (200, {"response": {"o": {"children": 1}}, "multi": True})
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from dash import Input, Output, html
+
+from async_dash import Dash
+from async_dash.caching import FileCallbackCache, MemoryCallbackCache, invocation_key
+
+from conftest import invocation, post
+
+
+@pytest.fixture(params=["memory", "file"])
+def make_cache(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "memory":
+            return MemoryCallbackCache(**kwargs)
+        return FileCallbackCache(str(tmp_path / "cache"), **kwargs)
+    return make
+
+
+def as_text(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+async def test_get_set_clear(make_cache):
+    cache = make_cache()
+    assert await cache.get("key") is None
+    await cache.set("key", '{"response":{}}')
+    assert as_text(await cache.get("key")) == '{"response":{}}'
+    await cache.clear()
+    assert await cache.get("key") is None
+
+
+async def test_entries_expire(make_cache):
+    cache = make_cache(timeout=0.05)
+    await cache.set("default", "1")
+    await cache.set("longer", "2", timeout=10)
+    await asyncio.sleep(0.1)
+    assert await cache.get("default") is None
+    assert as_text(await cache.get("longer")) == "2"
+
+
+async def test_least_recently_used_entries_are_evicted():
+    cache = MemoryCallbackCache(max_size=2)
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    await cache.get("a")
+    await cache.set("c", "3")
+    assert len(cache) == 2
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+
+
+async def test_file_cache_is_bounded(tmp_path):
+    cache = FileCallbackCache(str(tmp_path), max_size=10)
+    for i in range(25):
+        await cache.set(str(i), str(i))
+    assert len(list(tmp_path.iterdir())) <= 10
+    assert as_text(await cache.get("24")) == "24"
+
+
+def test_invocation_key_depends_on_the_inputs():
+    assert invocation_key("o.children", invocation("o", 1)) == invocation_key("o.children", invocation("o", 1))
+    assert invocation_key("o.children", invocation("o", 1)) != invocation_key("o.children", invocation("o", 2))
+    assert invocation_key("o.children", invocation("o", 1)) != invocation_key("p.children", invocation("o", 1))
+
+
+async def test_app_memoizes_responses(make_cache):
+    app = Dash(__name__, callback_cache=make_cache())
+    app.layout = html.Div()
+    calls = []
+
+    @app.callback(Output("o", "children"), Input("i", "value"), cache=True)
+    def square(value):
+        calls.append(value)
+        return value * value
+
+    @app.callback(Output("p", "children"), Input("i", "value"))
+    def uncached(value):
+        calls.append(-value)
+        return value
+
+    client = app.server.test_client()
+    for value in (2, 3, 2, 3):
+        status, data = await post(client, invocation("o", value))
+        assert (status, data["response"]) == (200, {"o": {"children": value * value}})
+    assert calls == [2, 3]
+    await post(client, invocation("p", 1))
+    await post(client, invocation("p", 1))
+    assert calls == [2, 3, -1, -1]
+
+
+async def test_callback_cache_and_timeout_override_the_app_default(tmp_path):
+    app = Dash(__name__)
+    app.layout = html.Div()
+    cache = FileCallbackCache(str(tmp_path))
+    calls = []
+
+    @app.callback(Output("o", "children"), Input("i", "value"), cache=cache, cache_timeout=0.05)
+    def echo(value):
+        calls.append(value)
+        return value
+
+    client = app.server.test_client()
+    await post(client, invocation("o", 1))
+    await post(client, invocation("o", 1))
+    assert calls == [1]
+    await asyncio.sleep(0.1)
+    assert await post(client, invocation("o", 1)) == (200, {"response": {"o": {"children": 1}}, "multi": True})
+    assert calls == [1, 1]
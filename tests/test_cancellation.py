@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+from dash import Input, Output, html
+
+from async_dash import Dash, is_cancelled
+
+from conftest import invocation, post, until
+
+
+def make_app(**kwargs):
+    app = Dash(__name__, **kwargs)
+    app.layout = html.Div()
+    return app
+
+
+async def test_newer_invocation_supersedes_the_previous_one():
+    app = make_app(cancel_superseded_callbacks=True)
+    cancelled = []
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    async def slow(value):
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            cancelled.append(value)
+            raise
+        return value
+
+    client = app.server.test_client()
+    first = asyncio.ensure_future(post(client, invocation("o", 1), session="page"))
+    await asyncio.sleep(0.02)
+    second = await post(client, invocation("o", 2), session="page")
+    # The client discards the response of a superseded invocation.
+    assert await first == (204, None)
+    assert second == (200, {"response": {"o": {"children": 2}}, "multi": True})
+    assert cancelled == [1]
+
+
+async def test_other_sessions_are_not_superseded():
+    app = make_app(cancel_superseded_callbacks=True)
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    async def slow(value):
+        await asyncio.sleep(0.05)
+        return value
+
+    client = app.server.test_client()
+    results = await asyncio.gather(
+        post(client, invocation("o", 1), session="a"),
+        post(client, invocation("o", 2), session="b"),
+        post(client, invocation("o", 3)),
+    )
+    assert [status for status, _ in results] == [200, 200, 200]
+
+
+async def test_timeout_answers_504():
+    app = make_app(callback_timeout=0.05)
+    cancelled = []
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    async def hang(value):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(value)
+            raise
+
+    @app.callback(Output("p", "children"), Input("i", "value"), timeout=1)
+    async def quick(value):
+        await asyncio.sleep(0.1)
+        return value
+
+    client = app.server.test_client()
+    assert await post(client, invocation("o", 1)) == (504, None)
+    assert cancelled == [1]
+    # The callback timeout overrides the default.
+    status, _ = await post(client, invocation("p", 1))
+    assert status == 200
+
+
+async def test_timeout_releases_the_slot():
+    app = make_app(callback_timeout=0.05, max_concurrent_callbacks=1)
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    async def hang(value):
+        if value == "hang":
+            await asyncio.Event().wait()
+        return value
+
+    client = app.server.test_client()
+    assert await post(client, invocation("o", "hang")) == (504, None)
+    assert app.admission_stats["running"] == 0
+    assert await post(client, invocation("o", "next")) == (
+        200, {"response": {"o": {"children": "next"}}, "multi": True}
+    )
+
+
+async def test_thread_callback_sees_the_cancellation():
+    app = make_app(callback_timeout=0.05)
+    stopped = threading.Event()
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    def poll(value):
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            if is_cancelled():
+                stopped.set()
+                return value
+            time.sleep(0.005)
+        return value
+
+    client = app.server.test_client()
+    assert await post(client, invocation("o", 1)) == (504, None)
+    await until(stopped.is_set)
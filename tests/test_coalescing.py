@@ -0,0 +1,107 @@
+import asyncio
+
+from dash import Input, Output, html
+
+from async_dash import Dash
+from async_dash.coalescing import SingleFlight
+
+from conftest import invocation, post, until
+
+
+async def test_concurrent_calls_share_the_result():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*[single_flight.run("key", func) for _ in range(3)])
+    assert results == ["result"] * 3
+    assert len(calls) == 1
+    assert single_flight.stats == {"calls": 3, "coalesced": 2, "in_flight": 0}
+    # Once done, the next call starts over.
+    await single_flight.run("key", func)
+    assert len(calls) == 2
+
+
+async def test_cancelled_caller_does_not_cancel_the_others():
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    first = asyncio.ensure_future(single_flight.run("key", func))
+    second = asyncio.ensure_future(single_flight.run("key", func))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "result"
+    assert first.cancelled()
+
+
+async def test_last_cancelled_caller_cancels_the_work():
+    single_flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def func():
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    callers = [asyncio.ensure_future(single_flight.run("key", func)) for _ in range(2)]
+    await started.wait()
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert single_flight.stats["in_flight"] == 0
+
+
+async def test_app_coalesces_identical_invocations():
+    app = Dash(__name__, coalesce_callbacks=True)
+    app.layout = html.Div()
+    calls = []
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    async def slow(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value
+
+    client = app.server.test_client()
+    results = await asyncio.gather(*[post(client, invocation("o", 1)) for _ in range(3)])
+    assert [status for status, _ in results] == [200] * 3
+    assert calls == [1]
+    assert app.coalescing_stats["coalesced"] == 2
+
+
+async def test_timed_out_coalesced_invocation_releases_its_slot():
+    app = Dash(__name__, coalesce_callbacks=True, callback_timeout=0.05, max_concurrent_callbacks=1)
+    app.layout = html.Div()
+    cancelled = []
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    async def hang(value):
+        if value == "hang":
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(value)
+                raise
+        return value
+
+    client = app.server.test_client()
+    status, _ = await post(client, invocation("o", "hang"))
+    assert status == 504
+    await until(lambda: cancelled)
+    assert await post(client, invocation("o", "next")) == (
+        200, {"response": {"o": {"children": "next"}}, "multi": True}
+    )
+    assert app.admission_stats["running"] == 0
+    assert app.coalescing_stats["in_flight"] == 0
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+from dash import Input, Output, html
+from dash.exceptions import PreventUpdate
+
+from async_dash import Dash
+from async_dash.diffing import OutputDiffer, SerializedProps
+
+from conftest import post
+
+
+def invocation(value):
+    return {
+        "output": "..a.children...b.children..",
+        "outputs": [{"id": "a", "property": "children"}, {"id": "b", "property": "children"}],
+        "inputs": [{"id": "i", "property": "value", "value": value}],
+        "changedPropIds": ["i.value"],
+    }
+
+
+def make_app(cache=None, **kwargs):
+    app = Dash(__name__, **kwargs)
+    app.layout = html.Div()
+
+    @app.callback(Output("a", "children"), Output("b", "children"), Input("i", "value"), cache=cache)
+    def split(value):
+        return "constant", value
+
+    return app
+
+
+def test_serialized_props_round_trip():
+    data = '{"response":{"a":{"children":1,"title":"x"},"{\\"index\\":1}":{"children":[1,2]}},"multi":true}'
+    props = SerializedProps.from_json(data)
+    assert json.loads(str(props)) == json.loads(data)
+
+
+def test_differ_leaves_out_unchanged_props():
+    differ = OutputDiffer()
+    first = '{"response":{"a":{"children":1},"b":{"children":2}},"multi":true}'
+    assert json.loads(differ.apply("page", first)) == json.loads(first)
+    second = differ.apply("page", '{"response":{"a":{"children":1},"b":{"children":3}},"multi":true}')
+    assert json.loads(second) == {"response": {"b": {"children": 3}}, "multi": True}
+    with pytest.raises(PreventUpdate):
+        differ.apply("page", '{"response":{"a":{"children":1},"b":{"children":3}},"multi":true}')
+    # Every page holds its own values.
+    assert json.loads(differ.apply("other", first)) == json.loads(first)
+    assert differ.stats["skipped"] == 3
+
+
+def test_differ_forgets_the_least_recent_sessions():
+    differ = OutputDiffer(max_sessions=1)
+    data = '{"response":{"a":{"children":1}},"multi":true}'
+    differ.apply("first", data)
+    differ.apply("second", data)
+    assert differ.stats["sessions"] == 1
+    assert json.loads(differ.apply("first", data)) == json.loads(data)
+
+
+async def test_app_sends_changed_outputs_only():
+    client = make_app(diff_callback_outputs=True).server.test_client()
+    assert await post(client, invocation(1), session="page") == (
+        200, {"response": {"a": {"children": "constant"}, "b": {"children": 1}}, "multi": True}
+    )
+    assert await post(client, invocation(2), session="page") == (
+        200, {"response": {"b": {"children": 2}}, "multi": True}
+    )
+    assert await post(client, invocation(2), session="page") == (204, None)
+    # Without a session, the whole response is sent.
+    _, data = await post(client, invocation(2))
+    assert data["response"] == {"a": {"children": "constant"}, "b": {"children": 2}}
+
+
+async def test_diffing_applies_to_cached_responses():
+    client = make_app(cache=True, diff_callback_outputs=True).server.test_client()
+    await post(client, invocation(1), session="page")
+    await post(client, invocation(2), session="page")
+    assert await post(client, invocation(1), session="page") == (
+        200, {"response": {"b": {"children": 1}}, "multi": True}
+    )
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import threading
+
+import pytest
+from dash import Input, Output, html
+
+from async_dash import Dash
+from async_dash.executors import CallbackExecutor, validate_executor
+
+from conftest import invocation, post
+
+
+def module_level(value):
+    return value
+
+
+def test_validate_executor():
+    validate_executor("loop")
+    validate_executor("process", module_level)
+    with pytest.raises(ValueError):
+        validate_executor("fork")
+
+    def closure(value):
+        return value
+
+    with pytest.raises(ValueError):
+        validate_executor("process", closure)
+
+
+async def test_thread_executor_runs_off_the_loop():
+    executor = CallbackExecutor()
+    thread = await executor.run(threading.get_ident, None, (), {})
+    assert thread != threading.get_ident()
+    assert await executor.run(threading.get_ident, "loop", (), {}) == threading.get_ident()
+
+
+async def test_closures_run_in_a_thread_under_the_process_default(caplog):
+    app = Dash(__name__, callback_executor="process")
+    app.layout = html.Div()
+    loop_thread = threading.get_ident()
+
+    def register():
+        @app.callback(Output("o", "children"), Input("i", "value"))
+        def closure(value):
+            return threading.get_ident() != loop_thread
+
+    register()
+    client = app.server.test_client()
+    with caplog.at_level(logging.WARNING, logger="async_dash.executors"):
+        for _ in range(2):
+            status, data = await post(client, invocation("o", 1))
+            assert (status, data["response"]) == (200, {"o": {"children": True}})
+    # Logged once per callback.
+    assert len([r for r in caplog.records if "register.<locals>.closure" in r.getMessage()]) == 1
+
+
+def test_process_executor_rejects_closures_at_registration():
+    app = Dash(__name__)
+
+    with pytest.raises(ValueError):
+        @app.callback(Output("o", "children"), Input("i", "value"), executor="process")
+        def closure(value):
+            return value
+
+    with pytest.raises(ValueError):
+        @app.callback(Output("p", "children"), Input("i", "value"), executor="thread")
+        async def coroutine(value):
+            await asyncio.sleep(0)
+            return value
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+from dash import Output, html
+
+from async_dash import Dash
+from async_dash.feeds import Feed, FeedHub, generator
+
+from conftest import until
+
+
+def make_hub(produce, retry=0.01):
+    hub = FeedHub()
+    hub.add(Feed("feed", Output("o", "children"), generator(produce), json.dumps, retry=retry))
+    return hub
+
+
+async def test_producer_runs_while_subscribed():
+    async def count():
+        for i in range(1000):
+            yield i
+            await asyncio.sleep(0.005)
+
+    hub = make_hub(count)
+    assert not hub.feeds["feed"].running
+    subscription = hub.subscribe()
+    [message] = await subscription.get()
+    assert json.loads(message) == {"response": {"o": {"children": 0}}, "multi": True}
+    subscription.close()
+    assert hub.stats["running"] == 0
+    assert hub.stats["subscriptions"] == 0
+
+
+async def test_slow_subscriber_receives_the_latest_value():
+    async def count():
+        for i in range(3):
+            yield i
+
+    hub = make_hub(count, retry=10)
+    subscription = hub.subscribe()
+    await until(lambda: hub.stats["published"] == 3)
+    [message] = await subscription.get()
+    assert json.loads(message)["response"] == {"o": {"children": 2}}
+    assert subscription.dropped == 2
+    subscription.close()
+
+
+async def test_ended_producer_is_restarted():
+    runs = []
+
+    async def once():
+        runs.append(1)
+        yield len(runs)
+
+    hub = make_hub(once)
+    subscription = hub.subscribe()
+    await until(lambda: len(runs) >= 2)
+    subscription.close()
+    await hub.stop()
+
+
+async def test_app_serves_the_feeds():
+    app = Dash(__name__)
+    app.layout = html.Div()
+
+    @app.feed(Output("o", "children"), interval=0.01)
+    def clock():
+        return "tick"
+
+    client = app.server.test_client()
+    response = await client.get("/_dash-feeds?feed=unknown")
+    assert response.status_code == 404
+    async with client.request("/_dash-feeds?feed=clock") as connection:
+        await connection.send_complete()
+        data = await connection.receive()
+        assert data.startswith(b'data: {"response":{"o":{"children":"tick"}}')
+        assert app.feed_stats["subscriptions"] == 1
+        await connection.disconnect()
+    await until(lambda: app.feed_stats["subscriptions"] == 0)
+
+
+async def test_response_not_sent_does_not_subscribe():
+    app = Dash(__name__)
+    app.layout = html.Div()
+
+    @app.feed(Output("o", "children"), interval=0.01)
+    def clock():
+        return "tick"
+
+    async with app.server.test_request_context("/_dash-feeds"):
+        response = await app.serve_feeds()
+    assert response.status_code == 200
+    assert app.feed_stats["subscriptions"] == 0
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import threading
+import time
+
+from dash import Input, Output, dcc, html
+
+from async_dash import AsyncioLongCallbackManager, Dash
+
+from conftest import until
+
+
+def wait(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "Timed out waiting for the condition"
+        time.sleep(0.005)
+
+
+def test_result_of_a_sync_job():
+    manager = AsyncioLongCallbackManager()
+
+    def job(set_progress, args):
+        set_progress("half")
+        return args * 2
+
+    manager.call_job_fn("key", job, 21)
+    wait(lambda: manager.result_ready("key"))
+    assert manager.get_result("key", None) == 42
+    # Without cache_by, a result is retrieved once.
+    assert not manager.result_ready("key")
+    assert manager.get_progress("key") is None
+    manager.shutdown()
+
+
+def test_terminated_job_stops_at_its_next_progress():
+    manager = AsyncioLongCallbackManager()
+    started = threading.Event()
+    steps = []
+
+    def job(set_progress, args):
+        for i in range(100):
+            set_progress(i)
+            steps.append(i)
+            started.set()
+            time.sleep(0.005)
+        return args
+
+    job_id = manager.call_job_fn("key", job, None)
+    started.wait(1)
+    assert manager.job_running(job_id)
+    manager.terminate_job(job_id)
+    assert not manager.job_running(job_id)
+    assert manager.get_progress("key") is None
+    wait(lambda: not manager._jobs)  # pylint: disable=protected-access
+    assert len(steps) < 100
+    assert not manager.result_ready("key")
+    manager.shutdown()
+
+
+def test_failed_job_drops_its_progress():
+    manager = AsyncioLongCallbackManager()
+
+    def job(set_progress, args):
+        set_progress(1)
+        raise ValueError(args)
+
+    manager.call_job_fn("key", job, "boom")
+    wait(lambda: not manager._jobs)  # pylint: disable=protected-access
+    assert manager.get_progress("key") is None
+    assert not manager.result_ready("key")
+    manager.shutdown()
+
+
+def test_results_are_bounded():
+    manager = AsyncioLongCallbackManager(max_results=2)
+
+    def job(set_progress, args):
+        set_progress(args)
+        return args
+
+    for key in ("a", "b", "c"):
+        manager.call_job_fn(key, job, key)
+    wait(lambda: not manager._jobs)  # pylint: disable=protected-access
+    assert [manager.result_ready(key) for key in ("a", "b", "c")] == [False, True, True]
+    assert manager.get_progress("a") is None
+    manager.shutdown()
+
+
+async def test_coroutine_job_runs_on_the_server_loop():
+    manager = AsyncioLongCallbackManager()
+    loop = asyncio.get_running_loop()
+    loops = []
+
+    async def job(set_progress, args):
+        loops.append(asyncio.get_running_loop())
+        await asyncio.sleep(0.01)
+        return args
+
+    manager.call_job_fn("key", job, "done")
+    await until(lambda: manager.result_ready("key"))
+    assert manager.get_result("key", None) == "done"
+    assert loops == [loop]
+    manager.shutdown()
+
+
+async def poll(client, dependency, value, max_polls=50):
+    """Invoke a long callback the way the renderer does: poll until its output is set, returning the updates."""
+    outputs = [dict(zip(("id", "property"), o.rsplit(".", 1))) for o in dependency["output"].strip(".").split("...")]
+    store, updates = {}, []
+    for n_intervals in range(max_polls):
+        # The interval of the long callback is the first input, the others are those of the callback.
+        inputs = [dict(dependency["inputs"][0], value=n_intervals)]
+        inputs += [dict(i, value=value) for i in dependency["inputs"][1:]]
+        state = [{"id": s["id"], "property": s["property"], "value": store} for s in dependency["state"]]
+        response = await client.post("/_dash-update-component", json={
+            "output": dependency["output"], "outputs": outputs, "inputs": inputs, "state": state, "changedPropIds": [],
+        })
+        assert response.status_code == 200
+        components = json.loads(await response.get_data())["response"]
+        store = next(v["data"] for k, v in components.items() if k.startswith("_long_callback_store"))
+        update = {k: v for k, v in components.items() if not k.startswith("_long_callback")}
+        updates.append(update)
+        if "o" in update:
+            return updates
+        await asyncio.sleep(0.02)
+    raise AssertionError("The long callback did not complete")
+
+
+async def test_app_long_callbacks():
+    manager = AsyncioLongCallbackManager()
+    app = Dash(__name__, long_callback_manager=manager)
+    app.layout = html.Div([dcc.Input(id="a"), html.Div(id="o"), html.Div(id="p")])
+
+    @app.long_callback(Output("o", "children"), Input("a", "value"), progress=Output("p", "children"), interval=50)
+    def slow(set_progress, value):
+        for i in range(3):
+            set_progress(str(i))
+            time.sleep(0.03)
+        return "sync {}".format(value)
+
+    client = app.server.test_client()
+    await client.get("/")
+    dependencies = json.loads(await (await client.get("/_dash-dependencies")).get_data())
+    updates = await poll(client, dependencies[0], 7)
+    assert updates[-1]["o"] == {"children": "sync 7"}
+    assert any(update.get("p", {}).get("children") in ("0", "1", "2") for update in updates)
+    assert not manager._jobs  # pylint: disable=protected-access
+    manager.shutdown()
+
+
+async def test_app_coroutine_long_callback():
+    manager = AsyncioLongCallbackManager()
+    app = Dash(__name__, long_callback_manager=manager)
+    app.layout = html.Div([dcc.Input(id="a"), html.Div(id="o")])
+
+    @app.long_callback(Output("o", "children"), Input("a", "value"), interval=50)
+    async def slow(value):
+        await asyncio.sleep(0.05)
+        return "async {}".format(value)
+
+    client = app.server.test_client()
+    await client.get("/")
+    dependencies = json.loads(await (await client.get("/_dash-dependencies")).get_data())
+    updates = await poll(client, dependencies[0], 7)
+    assert updates[-1]["o"] == {"children": "async 7"}
+    manager.shutdown()
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from dash import Input, Output, html
+
+from async_dash import Dash
+
+from conftest import invocation, post
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def spin_samples(record):
+    return sum(count for stack, count in record["samples"] if ":spin:" in stack)
+
+
+async def test_sync_callback_is_sampled_in_its_thread():
+    app = Dash(__name__, slow_callback_threshold=0.05)
+    app.layout = html.Div()
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    def slow(value):
+        spin(0.2)
+        return value
+
+    client = app.server.test_client()
+    await post(client, invocation("o", 1))
+    [record] = app.slow_callbacks
+    assert record["callback"] == "o.children"
+    assert record["duration"] >= 0.2
+    assert spin_samples(record) > 0
+
+
+async def test_fast_callbacks_are_not_recorded():
+    app = Dash(__name__, slow_callback_threshold=1)
+    app.layout = html.Div()
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    def fast(value):
+        return value
+
+    client = app.server.test_client()
+    await post(client, invocation("o", 1))
+    assert app.slow_callbacks == []
+
+
+async def test_profiled_callback_under_supersession():
+    app = Dash(__name__, slow_callback_threshold=0.05, cancel_superseded_callbacks=True)
+    app.layout = html.Div()
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    async def slow(value):
+        if value == 1:
+            # Superseded while waiting.
+            await asyncio.sleep(1)
+        spin(0.1)
+        await asyncio.sleep(0)
+        spin(0.1)
+        return value
+
+    client = app.server.test_client()
+    first = asyncio.ensure_future(post(client, invocation("o", 1), session="page"))
+    await asyncio.sleep(0.02)
+    assert await post(client, invocation("o", 2), session="page") == (
+        200, {"response": {"o": {"children": 2}}, "multi": True}
+    )
+    assert await first == (204, None)
+    # The callback executes in a task of its own, which is the one sampled.
+    [record] = [record for record in app.slow_callbacks if record["duration"] >= 0.2]
+    assert spin_samples(record) > 0
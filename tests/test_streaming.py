@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from dash import Input, Output, html, no_update
+from dash.exceptions import PreventUpdate
+
+from async_dash import Dash
+
+from conftest import post
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+def make_app():
+    app = Dash(__name__, stream_callbacks=True)
+    app.layout = html.Div()
+
+    @app.callback(Output("b", "children"), Output("c", "children"), Input("a", "value"))
+    async def progress(value):
+        if value is None:
+            raise PreventUpdate
+        for i in range(3):
+            await asyncio.sleep(0.01)
+            yield i, no_update
+        yield no_update, "done {}".format(value)
+
+    return app
+
+
+def invocation(value):
+    return {
+        "output": "..b.children...c.children..",
+        "outputs": [{"id": "b", "property": "children"}, {"id": "c", "property": "children"}],
+        "inputs": [{"id": "a", "property": "value", "value": value}],
+        "changedPropIds": ["a.value"],
+    }
+
+
+async def test_updates_are_streamed_as_ndjson():
+    client = make_app().server.test_client()
+    response = await client.post("/_dash-update-component", json=invocation(1), headers=NDJSON)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = (await response.get_data(as_text=True)).splitlines()
+    assert [json.loads(line)["response"] for line in lines] == [
+        {"b": {"children": 0}},
+        {"b": {"children": 1}},
+        {"b": {"children": 2}},
+        {"c": {"children": "done 1"}},
+    ]
+
+
+async def test_updates_are_merged_without_streaming():
+    client = make_app().server.test_client()
+    assert await post(client, invocation(1)) == (
+        200, {"response": {"b": {"children": 2}, "c": {"children": "done 1"}}, "multi": True}
+    )
+
+
+async def test_prevented_stream_answers_204():
+    client = make_app().server.test_client()
+    response = await client.post("/_dash-update-component", json=invocation(None), headers=NDJSON)
+    assert response.status_code == 204
+
+
+async def test_timeout_closes_the_generator():
+    app = Dash(__name__, stream_callbacks=True, callback_timeout=0.05)
+    app.layout = html.Div()
+    closed = asyncio.Event()
+
+    @app.callback(Output("b", "children"), Input("a", "value"))
+    async def endless(value):
+        try:
+            while True:
+                yield value
+                await asyncio.sleep(0.01)
+        finally:
+            closed.set()
+
+    client = app.server.test_client()
+    body = {
+        "output": "b.children",
+        "outputs": {"id": "b", "property": "children"},
+        "inputs": [{"id": "a", "property": "value", "value": 1}],
+    }
+    response = await client.post("/_dash-update-component", json=body, headers=NDJSON)
+    assert response.status_code == 200
+    lines = (await response.get_data(as_text=True)).splitlines()
+    assert lines and all(json.loads(line) == {"response": {"b": {"children": 1}}, "multi": True} for line in lines)
+    await asyncio.wait_for(closed.wait(), 1)
+    assert app.admission_stats["running"] == 0
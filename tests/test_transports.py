@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+from dash import Input, Output, html
+from dash.exceptions import PreventUpdate
+
+from async_dash import Dash
+
+from conftest import invocation
+
+
+def make_app(**kwargs):
+    app = Dash(__name__, **kwargs)
+    app.layout = html.Div()
+
+    @app.callback(Output("o", "children"), Input("i", "value"))
+    async def echo(value):
+        if value == "fail":
+            raise ValueError("boom")
+        await asyncio.sleep(0.01)
+        return value
+
+    @app.callback(Output("p", "children"), Input("i", "value"))
+    def prevent(value):
+        raise PreventUpdate
+
+    return app
+
+
+def routes(app):
+    return {rule.rule for rule in app.server.url_map.iter_rules()}
+
+
+def test_routes_are_registered_on_demand():
+    assert not {"/_dash-update-component-batch", "/_dash-update-component-ws"} & routes(make_app())
+    assert "/_dash-update-component-batch" in routes(make_app(batch_callbacks=True))
+    assert "/_dash-update-component-ws" in routes(make_app(websocket_callbacks=True))
+
+
+async def test_batch_answers_each_invocation():
+    client = make_app(batch_callbacks=True).server.test_client()
+    bodies = [invocation("o", 1), invocation("p", 1), invocation("o", 2)]
+    response = await client.post("/_dash-update-component-batch", json=bodies)
+    assert response.status_code == 200
+    assert json.loads(await response.get_data()) == [
+        {"status": 200, "body": {"response": {"o": {"children": 1}}, "multi": True}},
+        {"status": 204},
+        {"status": 200, "body": {"response": {"o": {"children": 2}}, "multi": True}},
+    ]
+
+
+async def test_batch_sends_the_error_body_of_failed_invocations():
+    app = make_app(batch_callbacks=True)
+    client = app.server.test_client()
+    response = await client.post("/_dash-update-component-batch", json=[invocation("o", "fail"), invocation("o", 1)])
+    failed, succeeded = json.loads(await response.get_data())
+    assert failed["status"] == 500
+    assert "Internal Server Error" in failed["body"]
+    assert succeeded["status"] == 200
+    # As a regular request would.
+    single = await client.post("/_dash-update-component", json=invocation("o", "fail"))
+    assert await single.get_data(as_text=True) == failed["body"]
+
+
+async def test_websocket_answers_each_message():
+    client = make_app(websocket_callbacks=True).server.test_client()
+    async with client.websocket("/_dash-update-component-ws") as socket:
+        await socket.send(json.dumps({"id": 1, "body": invocation("o", "fail")}))
+        await socket.send(json.dumps({"id": 2, "body": invocation("o", 2)}))
+        results = {}
+        for _ in range(2):
+            result = json.loads(await socket.receive())
+            results[result["id"]] = result
+    assert results[1]["status"] == 500 and "Internal Server Error" in results[1]["body"]
+    assert results[2] == {"id": 2, "status": 200, "body": {"response": {"o": {"children": 2}}, "multi": True}}